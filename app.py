@@ -1,113 +1,107 @@
-import os
 import streamlit as st
-from dotenv import load_dotenv
-import google.generativeai as genai
+import os
+import tempfile
 import time
-import random
-import pandas as pd
 from datetime import datetime
+import uuid
+from script_cache import get_cache
+from budgets import get_budget
+from history_store import get_history_store, make_preview
+from exporter import EXPORT_FORMATS, script_filename, write_export
+from jobs import DONE, FAILED, QUEUED, get_job_queue
+from script_engine import (
+    CONTENT_TYPES, DURATION_OPTIONS, VARIANT_OPTIONS, ScriptResult, find_similar_script,
+    generate_all_formats, generate_variants, regenerate_section, remember_script
+)
+from sections import parse_sections, section_label
+from backends import get_backend
+from telemetry import get_telemetry
+from session_store import new_session_scripts, session_memory, session_memory_prometheus
+from speculation import get_speculator
+from scheduler import INTERACTIVE, get_scheduler
+from ui_assets import (
+    APP_CSS, CONTENT_TYPE_CARDS, CONTENT_TYPE_LABELS, CREATE_HEADER_HTML, FOOTER_HTML, NAV_OPTIONS,
+    PODCAST_TEMPLATE, TIPS_FOOTER_HTML, TIPS_MARKDOWN, TONE_OPTIONS, TYPE_CARD_HTML
+)
 
-# Load environment variables from .env
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-# Configure the Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+# Configure the model backend and open its connection once per process (no-op on reruns)
+get_backend().warm_up()
+
+# User-facing explanations for failed generations, by error kind
+ERROR_MESSAGES = {
+    "rate_limited": "We're receiving a lot of requests right now. Please try again in a minute.",
+    "unavailable": "The AI service is temporarily unavailable. Please try again shortly.",
+    "blocked": "The AI declined to write this script. Try rephrasing your title.",
+    "invalid_request": "This request couldn't be processed. Please check your settings.",
+    "unknown": "Something went wrong while generating your script.",
+}
+
+# How often a running generation job is polled while its text streams into the page
+JOB_POLL_SECONDS = 0.1
+
+# Function to start a script generation on the job queue (it is saved to history when done) and
+# remember it as the session's current generation; follow_generation renders it
+def start_generation(content_type, title, tone="casual", duration="medium", target_audience="general", use_cache=True, seed_script=None):
+    st.session_state.generation_job_id = get_job_queue().submit(
+        st.session_state.user_id, content_type, title, tone, duration, target_audience,
+        use_cache=use_cache, priority=INTERACTIVE, seed_script=seed_script
+    )
+
+# Function to follow the session's current generation: the job's text is rendered as it streams in,
+# and the finished script becomes current (a failure is kept for display). Widget interactions rerun
+# the page and only interrupt this polling, not the job; the next run picks the job up again.
+def follow_generation():
+    job_queue = get_job_queue()
+    job = job_queue.get(st.session_state.generation_job_id) if st.session_state.generation_job_id else None
+    if job is None:
+        st.session_state.generation_job_id = None
+        return
+    if st.button("✖️ Cancel generation", key="cancel_generation"):
+        job_queue.cancel(job.id)
+        st.session_state.generation_job_id = None
+        return
+    progress_bar = st.progress(0.0, text="Waiting for the first tokens...")
+    live_script = st.empty()
+    shown_tokens = None
+    while not job.finished:
+        if job.status == QUEUED:
+            progress_bar.progress(0.0, text=f"⏳ You're #{job_queue.queue_position(job.id)} in line...")
+        elif job.text and job.received_tokens != shown_tokens:
+            shown_tokens = job.received_tokens
+            progress_bar.progress(min(shown_tokens / job.max_output_tokens, 1.0), text=f"{shown_tokens} tokens received")
+            live_script.markdown(f'<div class="script-container">\n\n{job.text}\n\n</div>', unsafe_allow_html=True)
+        time.sleep(JOB_POLL_SECONDS)
+    live_script.empty()
+    progress_bar.empty()
+    st.session_state.generation_job_id = None
+    if job.status == DONE:
+        st.session_state.scripts.put("current", job.result.text)
+        st.session_state.generation_error = None
+    elif job.status == FAILED:
+        st.session_state.generation_error = job.result
+
+# Function to make a generation result current (and save it) or remember its error for display
+def apply_generation_result(content_type, title, result):
+    if result.ok:
+        st.session_state.scripts.put("current", result.text)
+        st.session_state.generation_error = None
+        save_to_history(content_type, title, result.text)
+    else:
+        st.session_state.generation_error = result
 
-# Script generation function using the official Gemini library
-def generate_script(content_type, title, tone="casual", duration="medium", target_audience="general"):
-    # Create a more detailed prompt based on all parameters
-    if content_type == "instagram":
-        prompt = f"""
-        Generate an engaging Instagram reel/story script about: "{title}"
-        Tone: {tone}
-        Duration: {duration} (keep it under 60 seconds of speaking time)
-        Target Audience: {target_audience}
-        
-        Format the script with clear sections for:
-        - Hook (attention-grabbing opening)
-        - Main content (2-3 key points)
-        - Call to action
-        
-        Include suggestions for visual elements/transitions in [brackets].
-        """
-    elif content_type == "youtube":
-        prompt = f"""
-        Generate a structured YouTube video script for: "{title}"
-        Tone: {tone}
-        Duration: {duration}
-        Target Audience: {target_audience}
-        
-        Format with:
-        - Attention-grabbing intro (30 seconds)
-        - Main content with clear sections/timestamps
-        - Conclusion and call to action
-        
-        Include B-roll suggestions, talking points, and transitions in [brackets].
-        """
-    elif content_type == "podcast":
-        prompt = f"""
-        Generate a set of insightful Q&A prompts for a podcast titled: "{title}"
-        Tone: {tone}
-        Target Audience: {target_audience}
-        
-        Include:
-        - 5-8 thought-provoking questions
-        - 2-3 follow-up questions for each main question
-        - Suggested talking points for the host
-        - Opening and closing segments
-        
-        Questions should encourage in-depth, interesting responses.
-        """
-    
-    try:
-        # Add a simulated loading delay for better UX
-        with st.spinner("AI is crafting your script..."):
-            # Simulate API call delay
-            progress_bar = st.progress(0)
-            for i in range(100):
-                time.sleep(0.02)  # Simulate API processing time
-                progress_bar.progress(i + 1)
-            
-            # Create the model and generate content
-            model = genai.GenerativeModel('gemini-1.5-pro')
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    top_k=40,
-                    top_p=0.95,
-                    max_output_tokens=1024
-                )
-            )
-            
-            # Remove the progress bar after completion
-            progress_bar.empty()
-            
-            # Extract generated text from response
-            generated_text = response.text
-            return generated_text
-    except Exception as e:
-        return f"Error generating script: {str(e)}"
+# Function to drop the variants being compared from the session
+def clear_variants():
+    for i in range((st.session_state.get('variants') or {}).get("count", 0)):
+        st.session_state.scripts.pop(f"variant:{i}")
+    st.session_state.variants = None
 
 # Function to save script to history
 def save_to_history(content_type, title, script):
-    if 'script_history' not in st.session_state:
-        st.session_state.script_history = []
-    
-    # Save to history with timestamp
-    st.session_state.script_history.append({
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "content_type": content_type,
-        "title": title,
-        "script": script
-    })
+    return get_history_store().save(st.session_state.user_id, content_type, title, script)
 
 # Function to load script from history
-def load_from_history(index):
-    if 'script_history' in st.session_state and index < len(st.session_state.script_history):
-        return st.session_state.script_history[index]
-    return None
+def load_from_history(script_id):
+    return get_history_store().get(st.session_state.user_id, script_id)
 
 # Set page configuration with custom theme
 st.set_page_config(
@@ -117,270 +111,193 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Apply custom CSS with enhanced vibrant design
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
-    
-    * {
-        font-family: 'Poppins', sans-serif;
-    }
-    
-    .main {
-        background: linear-gradient(135deg, #f5f7f9 0%, #e8f0fe 100%);
-    }
-    
-    .stApp {
-        max-width: 1200px;
-        margin: 0 auto;
-    }
-    
-    .script-container {
-        background-color: white;
-        padding: 25px;
-        border-radius: 12px;
-        box-shadow: 0 8px 20px rgba(0,0,0,0.1);
-        margin-top: 20px;
-        border-left: 5px solid #4B61D1;
-    }
-    
-    .content-card {
-        background: white;
-        padding: 20px;
-        border-radius: 12px;
-        margin-bottom: 20px;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.08);
-        transition: all 0.4s ease;
-        border: 1px solid rgba(0,0,0,0.05);
-    }
-    
-    .content-card:hover {
-        transform: translateY(-8px);
-        box-shadow: 0 12px 25px rgba(0,0,0,0.12);
-        border-color: rgba(75, 97, 209, 0.2);
-    }
-    
-    .stat-box {
-        background: linear-gradient(135deg, #4B61D1 0%, #7C8CE8 100%);
-        color: white;
-        padding: 10px;
-        border-radius: 8px;
-        text-align: center;
-        font-weight: 500;
-        box-shadow: 0 4px 10px rgba(75, 97, 209, 0.3);
-    }
-    
-    h1 {
-        color: #1E3A8A;
-        font-weight: 700;
-        margin-bottom: 5px;
-    }
-    
-    h2, h3 {
-        color: #1E3A8A;
-        font-weight: 600;
-    }
-    
-    .stButton>button {
-        background: linear-gradient(135deg, #4B61D1 0%, #3B4FBF 100%);
-        color: white;
-        border-radius: 8px;
-        padding: 10px 20px;
-        border: none;
-        font-weight: 500;
-        transition: all 0.3s;
-        box-shadow: 0 4px 10px rgba(59, 79, 191, 0.3);
-    }
-    
-    .stButton>button:hover {
-        background: linear-gradient(135deg, #3B4FBF 0%, #2A3CA9 100%);
-        transform: translateY(-2px) scale(1.02);
-        box-shadow: 0 6px 15px rgba(59, 79, 191, 0.4);
-    }
-    
-    .tab-content {
-        padding: 20px 0;
-    }
-    
-    /* Styling for sidebar */
-    .sidebar .css-1d391kg {
-        background: linear-gradient(180deg, #f8faff 0%, #e8f0fe 100%);
-    }
-    
-    .sidebar-header {
-        padding: 25px 0;
-        text-align: center;
-        border-bottom: 1px solid #e0e0e0;
-    }
-    
-    .sidebar-item {
-        padding: 12px;
-        margin: 8px 0;
-        border-radius: 8px;
-        transition: all 0.3s;
-        cursor: pointer;
-    }
-    
-    .sidebar-item:hover {
-        background-color: rgba(75, 97, 209, 0.1);
-        transform: translateX(5px);
-    }
-    
-    /* Added for clear content type indication */
-    .selected-type {
-        background: linear-gradient(135deg, #e8f0fe 0%, #d1ddff 100%);
-        border-left: 3px solid #4B61D1;
-        padding-left: 12px;
-        font-weight: 500;
-    }
-    
-    /* Content type cards */
-    .type-card {
-        text-align: center;
-        background: white;
-        border-radius: 12px;
-        padding: 20px 15px;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.08);
-        transition: all 0.4s;
-        height: 100%;
-        cursor: pointer;
-        border: 2px solid transparent;
-    }
-    
-    .type-card:hover {
-        transform: translateY(-6px);
-        box-shadow: 0 12px 25px rgba(75, 97, 209, 0.18);
-        border-color: #4B61D1;
-    }
-    
-    .type-card h3 {
-        font-size: 20px;
-        margin-bottom: 10px;
-        color: #1E3A8A;
-    }
-    
-    .type-card p {
-        font-size: 14px;
-        color: #555;
-    }
-    
-    .type-card .icon {
-        font-size: 36px;
-        margin-bottom: 15px;
-        color: #4B61D1;
-    }
-    
-    /* Animation for loading */
-    @keyframes pulse {
-        0% { opacity: 0.6; }
-        50% { opacity: 1; }
-        100% { opacity: 0.6; }
-    }
-    
-    .loading {
-        animation: pulse 1.5s infinite ease-in-out;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # Initialize session state variables
 if 'selected_content_type' not in st.session_state:
     st.session_state.selected_content_type = None
-if 'selected_history_index' not in st.session_state:
-    st.session_state.selected_history_index = None
-if 'current_script' not in st.session_state:
-    st.session_state.current_script = None
-if 'script_history' not in st.session_state:
-    st.session_state.script_history = []
+if 'selected_history_id' not in st.session_state:
+    st.session_state.selected_history_id = None
+if 'scripts' not in st.session_state:
+    # Script texts live compressed in a budgeted per-session store (see session_store); session
+    # state only keeps their names: "current", "format:<type>", "variant:<n>" and "similar"
+    st.session_state.scripts = new_session_scripts()
+if 'user_id' not in st.session_state:
+    # Keep the id in the URL so history survives page reloads
+    st.session_state.user_id = st.query_params.get("uid") or uuid.uuid4().hex
+    st.query_params["uid"] = st.session_state.user_id
+if 'history_page' not in st.session_state:
+    st.session_state.history_page = 1
+if 'job_ids' not in st.session_state:
+    st.session_state.job_ids = []
+if 'generation_job_id' not in st.session_state:
+    st.session_state.generation_job_id = None
 if 'nav_option' not in st.session_state:
     st.session_state.nav_option = "Create Script"
 
-# Sidebar for navigation and settings
-with st.sidebar:
-    st.markdown('<div class="sidebar-header">', unsafe_allow_html=True)
-    # Logo area
-    st.markdown("# 🎬 ScriptCraft AI")
-    st.markdown("#### Content Creator Studio")
-    st.markdown('</div>', unsafe_allow_html=True)
+# Function to render the sidebar: navigation, script settings, recent scripts and background jobs
+def render_sidebar():
+    with st.sidebar:
+        st.markdown('<div class="sidebar-header">', unsafe_allow_html=True)
+        # Logo area
+        st.markdown("# 🎬 ScriptCraft AI")
+        st.markdown("#### Content Creator Studio")
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    # Navigation
-    st.markdown("### 📍 Navigation")
+        # Navigation
+        st.markdown("### 📍 Navigation")
     
-    nav_options = ["Create Script", "My Scripts", "Tips & Templates"]
-    for nav in nav_options:
-        is_selected = st.session_state.nav_option == nav
-        style_class = "sidebar-item selected-type" if is_selected else "sidebar-item"
+        for nav in NAV_OPTIONS:
+            is_selected = st.session_state.nav_option == nav
+            style_class = "sidebar-item selected-type" if is_selected else "sidebar-item"
         
-        st.markdown(f"<div class='{style_class}'>", unsafe_allow_html=True)
-        if st.button(f"{'✓ ' if is_selected else ''}{nav}", key=f"nav_{nav}"):
-            st.session_state.nav_option = nav
-        st.markdown('</div>', unsafe_allow_html=True)
+            st.markdown(f"<div class='{style_class}'>", unsafe_allow_html=True)
+            if st.button(f"{'✓ ' if is_selected else ''}{nav}", key=f"nav_{nav}"):
+                st.session_state.nav_option = nav
+            st.markdown('</div>', unsafe_allow_html=True)
     
-    # Settings section for Create Script
-    if st.session_state.nav_option == "Create Script":
-        st.markdown("### ⚙️ Script Settings")
+        # Settings section for Create Script
+        if st.session_state.nav_option == "Create Script":
+            st.markdown("### ⚙️ Script Settings")
         
-        # Show content type selection if it exists
-        if st.session_state.selected_content_type:
-            content_type_labels = {
-                "instagram": "📱 Instagram Reel",
-                "youtube": "🎬 YouTube Video",
-                "podcast": "🎙️ Podcast Q&A"
-            }
-            st.markdown(f"<div class='selected-type'>**Selected type:** {content_type_labels.get(st.session_state.selected_content_type)}</div>", unsafe_allow_html=True)
+            # Show content type selection if it exists
+            if st.session_state.selected_content_type:
+                st.markdown(f"<div class='selected-type'>**Selected type:** {CONTENT_TYPE_LABELS.get(st.session_state.selected_content_type)}</div>", unsafe_allow_html=True)
         
-        # Advanced settings
-        with st.expander("Advanced Options", expanded=False):
-            tone_options = ["casual", "professional", "humorous", "inspirational", "educational"]
-            st.session_state.selected_tone = st.select_slider(
-                "Tone", 
-                options=tone_options, 
-                value=st.session_state.get('selected_tone', 'casual')
-            )
+            # Advanced settings
+            with st.expander("Advanced Options", expanded=False):
+                st.session_state.selected_tone = st.select_slider(
+                    "Tone", 
+                    options=TONE_OPTIONS, 
+                    value=st.session_state.get('selected_tone', 'casual')
+                )
             
-            duration_mapping = {
-                "instagram": ["15 seconds", "30 seconds", "60 seconds"],
-                "youtube": ["3-5 minutes", "5-10 minutes", "10-15 minutes", "15+ minutes"],
-                "podcast": ["20-30 minutes", "30-45 minutes", "45-60 minutes", "60+ minutes"]
-            }
+                if st.session_state.selected_content_type:
+                    durations = DURATION_OPTIONS.get(st.session_state.selected_content_type, ["Short", "Medium", "Long"])
+                    st.session_state.duration_selection = st.selectbox(
+                        "Duration", 
+                        durations,
+                        index=durations.index(st.session_state.get('duration_selection', durations[0])) if st.session_state.get('duration_selection') in durations else 0
+                    )
+                    budget = get_budget(st.session_state.selected_content_type, st.session_state.duration_selection)
+                    st.caption(f"Length target: ~{budget.target_words} words • up to {budget.max_output_tokens} tokens")
+                else:
+                    st.session_state.duration_selection = st.selectbox(
+                        "Duration", 
+                        ["Short", "Medium", "Long"],
+                        index=["Short", "Medium", "Long"].index(st.session_state.get('duration_selection', "Medium")) if st.session_state.get('duration_selection') in ["Short", "Medium", "Long"] else 1
+                    )
             
-            if st.session_state.selected_content_type:
-                durations = duration_mapping.get(st.session_state.selected_content_type, ["Short", "Medium", "Long"])
-                st.session_state.duration_selection = st.selectbox(
-                    "Duration", 
-                    durations,
-                    index=durations.index(st.session_state.get('duration_selection', durations[0])) if st.session_state.get('duration_selection') in durations else 0
+                st.session_state.target_audience = st.text_input(
+                    "Target Audience", 
+                    value=st.session_state.get('target_audience', 'general')
                 )
-            else:
-                st.session_state.duration_selection = st.selectbox(
-                    "Duration", 
-                    ["Short", "Medium", "Long"],
-                    index=["Short", "Medium", "Long"].index(st.session_state.get('duration_selection', "Medium")) if st.session_state.get('duration_selection') in ["Short", "Medium", "Long"] else 1
+            
+                st.session_state.variant_count = st.select_slider(
+                    "Variants to compare",
+                    options=VARIANT_OPTIONS,
+                    value=st.session_state.get('variant_count', VARIANT_OPTIONS[1])
                 )
             
-            st.session_state.target_audience = st.text_input(
-                "Target Audience", 
-                value=st.session_state.get('target_audience', 'general')
-            )
-    
-    # Recent scripts quick access
-    if len(st.session_state.script_history) > 0:
-        st.markdown("### 🕒 Recent Scripts")
-        for i, item in enumerate(st.session_state.script_history[-3:]):  # Show last 3
-            st.markdown(f"<div class='sidebar-item'>", unsafe_allow_html=True)
-            if st.button(f"{item['title'][:15]}...", key=f"recent_{i}"):
-                st.session_state.selected_history_index = len(st.session_state.script_history) - 3 + i
-                st.session_state.nav_option = "My Scripts"
-            st.markdown(f"<div style='font-size:11px;color:#666;'>{item['content_type'].title()} • {item['timestamp']}</div>", unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
+                st.session_state.speculative = st.checkbox(
+                    "⚡ Start generating early",
+                    value=st.session_state.get('speculative', False),
+                    help="Begin generating in the background once the title and type stop changing, so Generate answers sooner"
+                )
+        
+            # Response cache counters
+            cache_stats = get_cache().stats()
+            st.caption(f"⚡ Cache: {cache_stats['hits']} hits • {cache_stats['misses']} misses • {cache_stats['entries']} stored")
+    
+        # Recent scripts quick access
+        recent_scripts = get_history_store().recent(st.session_state.user_id, 3)  # Show last 3
+        if recent_scripts:
+            st.markdown("### 🕒 Recent Scripts")
+            for item in recent_scripts:
+                st.markdown(f"<div class='sidebar-item'>", unsafe_allow_html=True)
+                if st.button(f"{item['title'][:15]}...", key=f"recent_{item['id']}"):
+                    st.session_state.selected_history_id = item['id']
+                    st.session_state.history_page = 1
+                    st.session_state.nav_option = "My Scripts"
+                st.markdown(f"<div style='font-size:11px;color:#666;'>{item['content_type'].title()} • {item['timestamp']}</div>", unsafe_allow_html=True)
+                st.markdown('</div>', unsafe_allow_html=True)
+    
+        # Background jobs for this session (status is polled on each rerun / refresh)
+        job_queue = get_job_queue()
+        session_jobs = [job for job in (job_queue.get(job_id) for job_id in st.session_state.job_ids) if job is not None]
+        st.session_state.job_ids = [job.id for job in session_jobs]
+        if session_jobs:
+            st.markdown("### ⏳ Background Jobs")
+            job_icons = {"queued": "🕓", "running": "⚙️", "done": "✅", "failed": "⚠️", "cancelled": "🚫"}
+            for job in reversed(session_jobs):
+                status_text = job.status
+                if job.status == "queued":
+                    status_text += f" (#{job_queue.queue_position(job.id)} in line)"
+                st.markdown(f"{job_icons[job.status]} **{job.title[:20]}** • {job.content_type.title()} • {status_text}")
+                if not job.finished:
+                    if st.button("Cancel", key=f"cancel_job_{job.id}"):
+                        job_queue.cancel(job.id)
+                        st.rerun()
+                elif job.status == "done":
+                    if st.button("Open", key=f"open_job_{job.id}"):
+                        st.session_state.scripts.put("current", job.result.text)
+                        st.session_state.selected_content_type = job.content_type
+                        st.session_state.title_input = job.title
+                        st.session_state.nav_option = "Create Script"
+                        st.session_state.job_ids.remove(job.id)
+                        st.rerun()
+                elif job.status == "failed":
+                    st.caption(ERROR_MESSAGES[job.result.error_kind])
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("🔄 Refresh", key="refresh_jobs"):
+                    st.rerun()
+            with col2:
+                if st.button("Clear finished", key="clear_jobs"):
+                    st.session_state.job_ids = [job.id for job in session_jobs if not job.finished]
+                    st.rerun()
+    
+        # Generation telemetry for operators (open the app with ?admin=<SCRIPT_ADMIN_TOKEN>)
+        admin_token = os.getenv("SCRIPT_ADMIN_TOKEN")
+        if admin_token and st.query_params.get("admin") == admin_token:
+            with st.expander("📊 Telemetry", expanded=False):
+                telemetry = get_telemetry()
+                summary = telemetry.summary()
+                if summary.empty:
+                    st.caption("No generations recorded yet.")
+                else:
+                    overall = summary.set_index("content_type").loc["all"]
+                    st.caption(f"{int(overall['calls'])} calls • {overall['cache_hit_rate']:.0%} cache hits • {overall['error_rate']:.0%} errors • {int(overall['retries'])} retries")
+                    st.caption(f"Latency p50/p95/p99: {overall['latency_p50_ms']:.0f} / {overall['latency_p95_ms']:.0f} / {overall['latency_p99_ms']:.0f} ms")
+                    st.dataframe(summary.set_index("content_type").T, use_container_width=True)
+                    st.caption("Share of generations answered by each route")
+                    st.dataframe(telemetry.routes().set_index("content_type"), use_container_width=True)
+                speculation = get_speculator().stats()
+                if speculation["started"]:
+                    st.caption(f"Speculation: {speculation['started']} started • {speculation['hit_rate']:.0%} hits • {speculation['waste_rate']:.0%} wasted • {speculation['cancelled']} cancelled before running")
+                memory = session_memory()
+                scheduler = get_scheduler().stats()
+                st.caption(
+                    f"Scheduler: {scheduler['running']} running for {scheduler['users_running']} users • "
+                    + " • ".join(f"{queued} {priority} queued" for priority, queued in scheduler["queued"].items())
+                )
+                st.caption(
+                    f"Session memory: {memory['bytes'] / 1024:.0f} KiB compressed ({memory['raw_bytes'] / 1024:.0f} KiB of text) "
+                    f"across {memory['sessions']} sessions • {memory['spilled']} scripts spilled to disk"
+                )
+                st.download_button(
+                    "Prometheus metrics",
+                    telemetry.prometheus() + session_memory_prometheus() + get_speculator().prometheus() + get_scheduler().prometheus(),
+                    file_name="scriptcraft_metrics.prom",
+                    mime="text/plain",
+                    key="download_metrics"
+                )
 
-# Main content area based on navigation selection
-if st.session_state.nav_option == "Create Script":
+# Function to render the Create Script page
+def render_create_page():
     # Header section with animations and gradients
-    st.markdown("<div style='text-align:center;padding:20px 0;'>", unsafe_allow_html=True)
-    st.markdown("<h1 style='font-size:48px;background:linear-gradient(90deg, #1E3A8A, #4B61D1);-webkit-background-clip:text;-webkit-text-fill-color:transparent;'>ScriptCraft AI Studio</h1>", unsafe_allow_html=True)
-    st.markdown("<p style='font-size:18px;color:#555;margin-bottom:30px;'>Transform your ideas into engaging scripts in seconds with AI-powered creativity</p>", unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
+    for header_html in CREATE_HEADER_HTML:
+        st.markdown(header_html, unsafe_allow_html=True)
     
     # Input container
     with st.container():
@@ -402,158 +319,270 @@ if st.session_state.nav_option == "Create Script":
         st.write("##### Choose your content type:")
         col1, col2, col3 = st.columns(3)
         
-        # Content types with enhanced visual appeal
-        content_types = {
-            "instagram": {
-                "icon": "📱",
-                "name": "Instagram Reel",
-                "desc": "Short, engaging content for Instagram reels/stories"
-            },
-            "youtube": {
-                "icon": "🎬",
-                "name": "YouTube Video",
-                "desc": "Structured scripts for long-form YouTube videos"
-            },
-            "podcast": {
-                "icon": "🎙️",
-                "name": "Podcast Q&A",
-                "desc": "Insightful Q&A for engaging podcast episodes"
-            }
-        }
-        
-        # Create the buttons for each content type with enhanced UI
-        with col1:
-            is_selected = st.session_state.selected_content_type == "instagram"
-            border_style = "border-color: #4B61D1;" if is_selected else ""
-            bg_style = "background: linear-gradient(135deg, #e8f0fe 0%, #d1ddff 100%);" if is_selected else ""
-            
-            st.markdown(f"""
-            <div class="type-card" style="{border_style}{bg_style}" onclick="document.getElementById('instagram_btn').click();">
-                <div class="icon">{content_types["instagram"]["icon"]}</div>
-                <h3>{content_types["instagram"]["name"]}</h3>
-                <p>{content_types["instagram"]["desc"]}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Hidden button to handle the click
-            if st.button(content_types["instagram"]["name"], key="instagram_btn", help="Create content for Instagram reels and stories"):
-                st.session_state.selected_content_type = "instagram"
-                st.rerun()
-            
-        with col2:
-            is_selected = st.session_state.selected_content_type == "youtube"
-            border_style = "border-color: #4B61D1;" if is_selected else ""
-            bg_style = "background: linear-gradient(135deg, #e8f0fe 0%, #d1ddff 100%);" if is_selected else ""
-            
-            st.markdown(f"""
-            <div class="type-card" style="{border_style}{bg_style}" onclick="document.getElementById('youtube_btn').click();">
-                <div class="icon">{content_types["youtube"]["icon"]}</div>
-                <h3>{content_types["youtube"]["name"]}</h3>
-                <p>{content_types["youtube"]["desc"]}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Hidden button to handle the click
-            if st.button(content_types["youtube"]["name"], key="youtube_btn", help="Create scripted content for YouTube videos"):
-                st.session_state.selected_content_type = "youtube"
-                st.rerun()
-            
-        with col3:
-            is_selected = st.session_state.selected_content_type == "podcast"
-            border_style = "border-color: #4B61D1;" if is_selected else ""
-            bg_style = "background: linear-gradient(135deg, #e8f0fe 0%, #d1ddff 100%);" if is_selected else ""
-            
-            st.markdown(f"""
-            <div class="type-card" style="{border_style}{bg_style}" onclick="document.getElementById('podcast_btn').click();">
-                <div class="icon">{content_types["podcast"]["icon"]}</div>
-                <h3>{content_types["podcast"]["name"]}</h3>
-                <p>{content_types["podcast"]["desc"]}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Hidden button to handle the click
-            if st.button(content_types["podcast"]["name"], key="podcast_btn", help="Create Q&A content for podcast episodes"):
-                st.session_state.selected_content_type = "podcast"
-                st.rerun()
+        # Create the buttons for each content type with enhanced UI (card HTML is prebuilt in ui_assets)
+        for column, (content_type, card) in zip((col1, col2, col3), CONTENT_TYPE_CARDS.items()):
+            with column:
+                is_selected = st.session_state.selected_content_type == content_type
+                st.markdown(TYPE_CARD_HTML[(content_type, is_selected)], unsafe_allow_html=True)
+                
+                # Hidden button to handle the click
+                if st.button(card["name"], key=f"{content_type}_btn", help=card["help"]):
+                    st.session_state.selected_content_type = content_type
+                    st.rerun()
         
         # Show selected type with animation
         if st.session_state.selected_content_type:
-            st.success(f"Selected: {content_types[st.session_state.selected_content_type]['name']}")
+            st.success(f"Selected: {CONTENT_TYPE_CARDS[st.session_state.selected_content_type]['name']}")
         
         # Generate button (only active when both title and content type are selected)
         generate_disabled = not (title_input and st.session_state.selected_content_type)
         
         st.markdown("<div style='text-align:center;margin-top:20px;'>", unsafe_allow_html=True)
+        # The request as it stands, for speculative generation
+        speculator = get_speculator()
+        session_key = st.session_state.scripts.session_id
+        request = (
+            st.session_state.selected_content_type,
+            title_input,
+            st.session_state.get('selected_tone', "casual"),
+            st.session_state.get('duration_selection', "medium"),
+            st.session_state.get('target_audience', "general")
+        )
+        
         if st.button("✨ Generate My Script", disabled=generate_disabled, help="Generate your content script"):
             if not generate_disabled:
                 # Get advanced settings if available
                 tone = st.session_state.get('selected_tone', "casual")
                 duration = st.session_state.get('duration_selection', "medium")
                 target_audience = st.session_state.get('target_audience', "general")
-                    
-                # Generate the script
-                st.session_state.current_script = generate_script(
-                    st.session_state.selected_content_type,
-                    title_input,
-                    tone,
-                    duration,
-                    target_audience
-                )
                 
-                # Save to history
-                save_to_history(
-                    st.session_state.selected_content_type,
-                    title_input,
-                    st.session_state.current_script
-                )
+                # A matching speculation is picked up by the generation job: it joins its in-flight
+                # call or finds its result in the cache
+                speculator.claim(session_key, request)
+                
+                # Offer a cached script for a near-duplicate title before spending a model call
+                st.session_state.similar_offer = None
+                similar = find_similar_script(st.session_state.selected_content_type, title_input, tone, duration, target_audience)
+                if similar is not None:
+                    st.session_state.scripts.put("similar", similar["script"])
+                    st.session_state.similar_offer = {
+                        "title": similar["title"],
+                        "similarity": similar["similarity"],
+                        "request": (st.session_state.selected_content_type, title_input, tone, duration, target_audience),
+                    }
+                else:
+                    # Generate the script on the job queue (it saves it to history); followed below
+                    start_generation(
+                        st.session_state.selected_content_type,
+                        title_input,
+                        tone,
+                        duration,
+                        target_audience
+                    )
+        
+        # Speculate on the current request once it stops changing (opt-in, see Advanced Options)
+        if st.session_state.get('speculative') and not generate_disabled:
+            speculator.update(session_key, st.session_state.user_id, request)
+        else:
+            speculator.cancel(session_key)
+        
+        # Near-duplicate found: reuse it as is, use it as a starting point, or ignore it
+        offer = st.session_state.get('similar_offer')
+        if offer:
+            content_type, offer_title = offer["request"][:2]
+            st.info(f"We already have a script for \"{offer['title']}\" ({offer['similarity']:.0%} match).")
+            use_col, seed_col, fresh_col = st.columns(3)
+            with use_col:
+                use_similar = st.button("⚡ Use it", key="use_similar", help="Use the existing script instantly")
+            with seed_col:
+                seed_similar = st.button("🌱 Use as a starting point", key="seed_similar", help="Generate a new script based on the existing one")
+            with fresh_col:
+                fresh_similar = st.button("✨ Generate fresh", key="fresh_similar", help="Ignore the existing script")
+            if use_similar or seed_similar or fresh_similar:
+                similar_script = st.session_state.scripts.get("similar")
+                st.session_state.scripts.pop("similar")
+                st.session_state.similar_offer = None
+                if use_similar:
+                    result = ScriptResult(text=similar_script, cached=True, route="similar", similar_title=offer["title"])
+                    apply_generation_result(content_type, offer_title, result)
+                else:
+                    seed_script = {"title": offer["title"], "script": similar_script} if seed_similar else None
+                    start_generation(*offer["request"], seed_script=seed_script)
+        
+        # Queue the script on the background workers and keep working; it lands in history when done
+        if st.button("⏳ Queue in Background", disabled=generate_disabled, help="Generate without blocking the page"):
+            job_id = get_job_queue().submit(
+                st.session_state.user_id,
+                st.session_state.selected_content_type,
+                title_input,
+                st.session_state.get('selected_tone', "casual"),
+                st.session_state.get('duration_selection', "medium"),
+                st.session_state.get('target_audience', "general")
+            )
+            st.session_state.job_ids.append(job_id)
+            st.toast(f"Queued \"{title_input}\" in the background")
+        
+        # Several versions of the same script in one request, to compare before keeping one
+        if st.button("🎲 Generate Variants", disabled=generate_disabled, help="Generate several versions side by side and keep the best"):
+            with st.spinner("AI is crafting your variants..."):
+                results = generate_variants(*request, count=st.session_state.get('variant_count', VARIANT_OPTIONS[1]), user_id=st.session_state.user_id)
+            scripts = [result.text for result in results if result.ok]
+            clear_variants()
+            for i, script in enumerate(scripts):
+                st.session_state.scripts.put(f"variant:{i}", script)
+            st.session_state.variants = {"request": request, "count": len(scripts)} if scripts else None
+            st.session_state.generation_error = None if scripts else results[0]
+        
+        # Fan out one title to every format at once (wall-clock ~ the slowest of the three calls)
+        if st.button("🧩 Generate All Formats", disabled=not title_input, help="Generate Instagram, YouTube and podcast versions in parallel"):
+            tone = st.session_state.get('selected_tone', "casual")
+            target_audience = st.session_state.get('target_audience', "general")
+            selected_duration = st.session_state.get('duration_selection')
+            durations = {
+                content_type: selected_duration
+                for content_type, options in DURATION_OPTIONS.items()
+                if selected_duration in options
+            }
+            
+            # One placeholder per format, filled in as each request finishes
+            format_columns = st.columns(len(CONTENT_TYPES))
+            placeholders = {}
+            for column, content_type in zip(format_columns, CONTENT_TYPES):
+                placeholders[content_type] = column.empty()
+                placeholders[content_type].info(f"⏳ {CONTENT_TYPE_CARDS[content_type]['name']}...")
+            
+            st.session_state.all_format_types = []
+            for content_type, result in generate_all_formats(title_input, tone, durations, target_audience, user_id=st.session_state.user_id):
+                st.session_state.all_format_types.append(content_type)
+                if result.ok:
+                    st.session_state.scripts.put(f"format:{content_type}", result.text)
+                    placeholders[content_type].markdown(f"**{CONTENT_TYPE_CARDS[content_type]['name']}**\n\n{result.text}")
+                    save_to_history(content_type, title_input, result.text)
+                else:
+                    st.session_state.scripts.put(f"format:{content_type}", f"⚠️ {ERROR_MESSAGES[result.error_kind]}")
+                    placeholders[content_type].error(ERROR_MESSAGES[result.error_kind])
+            
+            for placeholder in placeholders.values():
+                placeholder.empty()
         st.markdown("</div>", unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
+    # The session's generation in progress, if any (see follow_generation)
+    follow_generation()
+    
+    # Last generation failure, reported as an error instead of being shown as a script
+    if st.session_state.get('generation_error'):
+        failed = st.session_state.generation_error
+        st.error(f"{ERROR_MESSAGES[failed.error_kind]}\n\nDetails: {failed.error}")
+    
+    # Output section for "Generate Variants": pick one to keep (only that one goes to history)
+    if st.session_state.get('variants'):
+        variants = st.session_state.variants
+        st.markdown("<h3 style='margin-top:30px;'>Compare Variants</h3>", unsafe_allow_html=True)
+        variant_columns = st.columns(variants["count"])
+        for i, column in enumerate(variant_columns):
+            script = st.session_state.scripts.get(f"variant:{i}")
+            with column:
+                st.markdown(f"**Variant {i + 1}**")
+                st.markdown('<div class="script-container">', unsafe_allow_html=True)
+                st.markdown(script)
+                st.markdown('</div>', unsafe_allow_html=True)
+                if st.button("✅ Keep this one", key=f"pick_variant_{i}"):
+                    content_type, title = variants["request"][:2]
+                    remember_script(*variants["request"], script)
+                    apply_generation_result(content_type, title, ScriptResult(text=script))
+                    clear_variants()
+                    st.rerun()
+        if st.button("Discard variants", key="discard_variants"):
+            clear_variants()
+            st.rerun()
+    
+    # Output section for "Generate All Formats"
+    if st.session_state.get('all_format_types'):
+        st.markdown("<h3 style='margin-top:30px;'>All Formats</h3>", unsafe_allow_html=True)
+        format_tabs = st.tabs([CONTENT_TYPE_CARDS[content_type]['name'] for content_type in st.session_state.all_format_types])
+        for tab, content_type in zip(format_tabs, st.session_state.all_format_types):
+            with tab:
+                st.markdown('<div class="script-container">', unsafe_allow_html=True)
+                st.markdown(st.session_state.scripts.get(f"format:{content_type}") or "")
+                st.markdown('</div>', unsafe_allow_html=True)
+    
     # Output section
-    if st.session_state.current_script:
+    current_script = st.session_state.scripts.get("current")
+    if current_script:
         st.markdown("<h3 style='margin-top:30px;'>Your Generated Script</h3>", unsafe_allow_html=True)
         
         # Script display with enhanced formatting
         st.markdown('<div class="script-container">', unsafe_allow_html=True)
-        st.markdown(st.session_state.current_script)
+        st.markdown(current_script)
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Action buttons for the script
         st.markdown("<div style='margin-top:20px;'>", unsafe_allow_html=True)
         col1, col2, col3 = st.columns(3)
         with col1:
-            if st.button("📋 Copy to Clipboard", help="Copy the script to clipboard"):
-                st.success("Script copied to clipboard!")
+            # Browsers only let the page itself write to the clipboard, so use the code block's copy icon
+            with st.expander("📋 Copy to Clipboard"):
+                st.code(current_script, language="markdown")
+                st.caption("Use the copy icon in the top-right corner of the box.")
         with col2:
-            if st.button("💾 Download as Text", help="Download the script as a text file"):
-                st.info("Download started...")
+            st.download_button(
+                "💾 Download as Text",
+                data=current_script,
+                file_name=script_filename(title_input or "script", "txt"),
+                mime="text/plain",
+                help="Download the script as a text file"
+            )
         with col3:
             if st.button("🔄 Regenerate", help="Generate a new version of the script"):
-                st.info("Regenerating script...")
                 # Get advanced settings if available
                 tone = st.session_state.get('selected_tone', "casual")
                 duration = st.session_state.get('duration_selection', "medium")
                 target_audience = st.session_state.get('target_audience', "general")
                 
-                # Regenerate the script
-                st.session_state.current_script = generate_script(
+                # Regenerate the script on the job queue, skipping the cached version; the rerun follows it
+                start_generation(
                     st.session_state.selected_content_type,
                     title_input,
                     tone,
                     duration,
-                    target_audience
-                )
-                
-                # Update history with new version
-                save_to_history(
-                    st.session_state.selected_content_type,
-                    title_input,
-                    st.session_state.current_script
+                    target_audience,
+                    use_cache=False
                 )
                 st.rerun()
         st.markdown("</div>", unsafe_allow_html=True)
         
+        # Section-level editing: rewrite just one part instead of the whole script
+        script_sections = parse_sections(current_script)
+        if len(script_sections) > 1:
+            with st.expander("✂️ Edit by section", expanded=False):
+                section_instruction = st.text_input(
+                    "What should change? (optional)",
+                    placeholder="e.g. make it punchier, add a statistic...",
+                    key="section_instruction"
+                )
+                for i, section in enumerate(script_sections):
+                    col1, col2 = st.columns([4, 1])
+                    with col1:
+                        st.markdown(f"**{section_label(section) or f'Section {i + 1}'}**")
+                        st.caption(make_preview(section, 160))
+                    with col2:
+                        if st.button("🔄 Rewrite", key=f"regenerate_section_{i}", help="Regenerate only this section"):
+                            with st.spinner("Rewriting this section..."):
+                                result = regenerate_section(
+                                    st.session_state.selected_content_type,
+                                    title_input,
+                                    st.session_state.get('selected_tone', "casual"),
+                                    st.session_state.get('target_audience', "general"),
+                                    current_script,
+                                    i,
+                                    section_instruction,
+                                    user_id=st.session_state.user_id
+                                )
+                            apply_generation_result(st.session_state.selected_content_type, title_input, result)
+                            st.rerun()
+        
         # Script evaluation with improved UI
         st.markdown("<h4 style='margin-top:30px;'>How was this script?</h4>", unsafe_allow_html=True)
         feedback = st.slider("Rate this script", 1, 5, 3)
@@ -563,116 +592,158 @@ if st.session_state.nav_option == "Create Script":
                 st.balloons()
                 st.success("Thank you for your feedback! We'll use it to improve future scripts.")
 
-elif st.session_state.nav_option == "My Scripts":
+# Function to render the My Scripts page
+def render_history_page():
     st.markdown("<h2>Your Saved Scripts</h2>", unsafe_allow_html=True)
-    if st.session_state.script_history:
-        for item in reversed(st.session_state.script_history):
-            st.markdown('<div class="content-card">', unsafe_allow_html=True)
-            st.markdown(f"**{item['title']}**  •  {item['content_type'].title()}  •  {item['timestamp']}")
-            st.markdown(item['script'])
-            st.markdown('</div>', unsafe_allow_html=True)
+    history_store = get_history_store()
+    
+    # Render one history entry as a collapsed preview, fetching the full text on expand
+    def render_history_item(item):
+        st.markdown('<div class="content-card">', unsafe_allow_html=True)
+        st.markdown(f"**{item['title']}**  •  {item['content_type'].title()}  •  {item['timestamp']}")
+        expanded = st.toggle(
+            "Show full script",
+            value=item['id'] == st.session_state.selected_history_id,
+            key=f"expand_{item['id']}"
+        )
+        if expanded:
+            full_item = load_from_history(item['id'])
+            st.markdown(full_item['script'] if full_item else "_This script is no longer available._")
+        else:
+            st.caption(item['preview'])
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Bulk export, written to a temporary file batch by batch rather than built in memory
+    with st.expander("📦 Export all scripts", expanded=False):
+        # Options are the labels themselves so the selected value round-trips through reruns
+        export_labels = {export_file["label"]: fmt for fmt, export_file in EXPORT_FORMATS.items()}
+        export_format = export_labels[st.selectbox("Format", list(export_labels), index=0, key="export_format")]
+        export_file = EXPORT_FORMATS[export_format]
+        if st.button("Prepare export", key="prepare_export"):
+            # Built in an anonymous temporary file that is deleted once it has been read for the download button;
+            # the button only exists on this run, so later reruns of the page don't load the export again
+            with tempfile.TemporaryFile() as f:
+                with st.spinner("Exporting your scripts..."):
+                    write_export(history_store.iter_batches(st.session_state.user_id), export_format, f)
+                f.seek(0)
+                st.download_button(
+                    "⬇️ Download export",
+                    data=f.read(),
+                    file_name=f"scriptcraft-scripts.{export_file['extension']}",
+                    mime=export_file["mime"],
+                    key="download_export"
+                )
+    
+    # Search box and filters, answered by the full-text index
+    search_col, type_col, date_col = st.columns([3, 1, 2])
+    with search_col:
+        search_text = st.text_input("Search scripts", placeholder="Search titles and script text...")
+    with type_col:
+        type_filter = st.selectbox("Type", ["All"] + CONTENT_TYPES, format_func=lambda t: t if t == "All" else t.title())
+    with date_col:
+        date_range = st.date_input("Date range", value=[])
+    
+    filtering = bool(search_text.strip()) or type_filter != "All" or len(date_range) > 0
+    if filtering:
+        date_from = date_to = None
+        if len(date_range) > 0:
+            date_from = datetime.combine(date_range[0], datetime.min.time()).timestamp()
+            date_to = datetime.combine(date_range[-1], datetime.max.time()).timestamp()
+        results = history_store.search(
+            st.session_state.user_id,
+            search_text,
+            content_type=None if type_filter == "All" else type_filter,
+            date_from=date_from,
+            date_to=date_to
+        )
+        st.caption(f"{len(results)} matching scripts" + (" (showing the best 50)" if len(results) == 50 else ""))
+        for item in results:
+            render_history_item(item)
     else:
-        st.info("No scripts saved yet.")
-
-elif st.session_state.nav_option == "Tips & Templates":
+        total_scripts = history_store.count(st.session_state.user_id)
+        if total_scripts:
+            page_size = 10
+            page_count = (total_scripts + page_size - 1) // page_size
+            st.session_state.history_page = min(st.session_state.history_page, page_count)
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                st.number_input("Page", min_value=1, max_value=page_count, key="history_page")
+            with col2:
+                st.caption(f"{total_scripts} scripts • page {st.session_state.history_page} of {page_count}")
+            
+            # Only the current page is loaded, as collapsed previews; full text is fetched on expand
+            for item in history_store.page(st.session_state.user_id, st.session_state.history_page, page_size):
+                render_history_item(item)
+        else:
+            st.info("No scripts saved yet.")
+
+# Function to render the Batch page
+def render_batch_page():
+    # Only this page needs the batch runner (and pandas), so it is imported on first visit
+    from batch import DEFAULT_WORKERS, read_rows, run_batch
+    
+    st.markdown("<h2>Batch Generation</h2>", unsafe_allow_html=True)
+    st.markdown("Upload a CSV or Parquet file with `title` and `content_type` columns "
+                "(optionally `tone`, `duration` and `target_audience`) to generate every script in one go.")
+    
+    uploaded_file = st.file_uploader("Batch file", type=["csv", "parquet"])
+    batch_workers = st.slider("Concurrent requests", 1, 16, DEFAULT_WORKERS)
+    batch_use_cache = st.checkbox("Reuse cached scripts", value=True)
+    
+    if uploaded_file is not None:
+        try:
+            batch_df = read_rows(uploaded_file, uploaded_file.name)
+        except Exception as e:
+            st.error(f"Could not read {uploaded_file.name}: {e}")
+            batch_df = None
+        
+        if batch_df is not None:
+            st.caption(f"{len(batch_df)} rows loaded")
+            st.dataframe(batch_df.head(20), use_container_width=True)
+            
+            if st.button("🚀 Run Batch", disabled=batch_df.empty):
+                batch_progress = st.progress(0.0, text="Starting batch...")
+                
+                def update_batch_progress(done, total):
+                    batch_progress.progress(done / total, text=f"{done}/{total} rows done")
+                
+                st.session_state.batch_results = run_batch(
+                    batch_df,
+                    max_workers=batch_workers,
+                    use_cache=batch_use_cache,
+                    on_progress=update_batch_progress
+                )
+                batch_progress.empty()
+    
+    # Results of the last batch run
+    if st.session_state.get('batch_results') is not None:
+        results = st.session_state.batch_results
+        failed = int(results["error"].notna().sum())
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows", len(results))
+        col2.metric("Failed", failed)
+        col3.metric("Median latency", f"{results['latency_seconds'].median():.2f}s")
+        st.dataframe(results, use_container_width=True)
+        st.download_button(
+            "💾 Download Results (CSV)",
+            data=results.to_csv(index=False).encode("utf-8"),
+            file_name="batch_results.csv",
+            mime="text/csv"
+        )
+
+# Function to render the Tips & Templates page
+def render_tips_page():
     st.markdown("<h2>Tips & Templates</h2>", unsafe_allow_html=True)
     
     # Section: Creating Engaging Interview Questions
-    st.markdown("""
-### Creating Engaging Interview Questions
-
-Great podcast interviews come from thoughtful questions that:
-
-- **Start broad, then go deep** - Begin with context-setting questions before diving into specifics
-- **Use the "curiosity ladder"** - Each question should build on the previous answer
-- **Ask "why" not just "what"** - Get to motivations and feelings, not just facts
-- **Prepare follow-ups** - Anticipate responses and have thoughtful follow-ups ready
-
-### Podcast Episode Structure
-
-1. **Intro (2-3 minutes)** - Welcome, guest introduction, episode overview
-2. **Background (5-10 minutes)** - Establish guest credibility and journey
-3. **Main discussion (15-30 minutes)** - Core topic exploration through prepared questions
-4. **Lightning round (5 minutes)** - Quick, fun questions to end on a high note
-5. **Outro (2 minutes)** - Thank guest, summarize insights, call-to-action
-
-### Creating a Comfortable Interview Environment
-
-- Send questions to guests in advance (but keep a few surprises)
-- Begin with softball questions to build rapport
-- Use "Yes, and..." technique to build on guest responses
-- Include personal stories or experiences to make the conversation relatable
-    """)
+    st.markdown(TIPS_MARKDOWN)
     st.markdown("</div>", unsafe_allow_html=True)
     
     # Example template section
     st.markdown('<div class="content-card">', unsafe_allow_html=True)
     st.markdown("### 🌟 Podcast Interview Template")
     
-    st.code("""
-# PODCAST INTERVIEW TEMPLATE
-
-## INTRO (2-3 minutes)
-HOST: "Welcome to [Podcast Name], the show where we [podcast mission]. I'm your host [Name], and today I'm thrilled to be joined by [Guest Name], who is [brief credential]. [Guest], welcome to the show!"
-
-GUEST: [Response]
-
-HOST: "For our listeners who might not be familiar with your work, could you share a bit about who you are and what you do?"
-
-GUEST: [Response]
-
-HOST: "On today's episode, we'll be diving into [episode topic]. Here's what we'll cover..."
-
-## BACKGROUND QUESTIONS (5-10 minutes)
-1. "What first drew you to [field/area of expertise]?"
-   * Follow-up: "Was there a specific moment when you knew this was your path?"
-
-2. "You've accomplished [notable achievement]. Can you walk us through that journey?"
-   * Follow-up: "What obstacles did you face along the way?"
-
-3. "How has your approach to [topic] evolved over time?"
-   * Follow-up: "What caused that shift in perspective?"
-
-## MAIN TOPIC QUESTIONS (15-30 minutes)
-4. "What's the biggest misconception people have about [topic]?"
-   * Follow-up: "Why do you think this misconception persists?"
-
-5. "In your [book/article/talk], you mentioned [specific point]. Could you elaborate on that?"
-   * Follow-up: "How have you applied this principle in your own work?"
-
-6. "What's a counterintuitive truth about [topic] that most people don't realize?"
-   * Follow-up: "How did you discover this?"
-
-7. "How do you think [recent development] will impact [industry/field]?"
-   * Follow-up: "What should people be doing to prepare for this change?"
-
-8. "If someone wanted to get started with [topic], what would be your advice?"
-   * Follow-up: "What resources would you recommend?"
-
-## LIGHTNING ROUND (5 minutes)
-9. "What's one tool or resource you couldn't live without?"
-10. "What's a book that changed your perspective?"
-11. "What's your favorite failure?" (lesson learned from a setback)
-12. "What's a small habit that has had a big impact on your success?"
-13. "Fill in the blank: 'Most people would be better at [topic] if they just _____.'"
-
-## OUTRO (2 minutes)
-HOST: "Before we wrap up, where can our listeners find you and learn more about your work?"
-
-GUEST: [Response]
-
-HOST: "Any final thoughts or advice for our listeners interested in [topic]?"
-
-GUEST: [Response]
-
-HOST: "Thank you so much for sharing your insights with us today. To our listeners, if you enjoyed this episode, please subscribe and leave a review. Join us next week when we'll be talking with [Next Guest] about [Topic]. Until then, [Signature Sign-off]."
-
-[NOTES FOR HOST]
-- Research guest thoroughly before interview
-- Listen actively and be willing to go off-script for interesting tangents
-- Have water available for guest
-- Monitor time to ensure all key questions are covered
-    """)
+    st.code(PODCAST_TEMPLATE)
     
     col1, col2 = st.columns(2)
     with col1:
@@ -684,16 +755,18 @@ HOST: "Thank you so much for sharing your insights with us today. To our listene
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Footer section for Tips & Templates
-    st.markdown("""
-<div style="margin-top: 50px; padding: 20px; background: linear-gradient(135deg, #f5f7f9 0%, #e8f0fe 100%); border-radius: 10px; text-align: center;">
-    <p style="margin-bottom: 10px; font-weight: 500;">ScriptCraft AI | Craft. Create. Connect.</p>
-    <p style="font-size: 12px; color: #666;">© 2023 ScriptCraft AI. All rights reserved.</p>
-</div>
-""", unsafe_allow_html=True)
+    st.markdown(TIPS_FOOTER_HTML, unsafe_allow_html=True)
+
+# Page bodies by navigation option; only the selected page's function runs on a rerun
+PAGES = {
+    "Create Script": render_create_page,
+    "My Scripts": render_history_page,
+    "Batch": render_batch_page,
+    "Tips & Templates": render_tips_page,
+}
+
+render_sidebar()
+PAGES[st.session_state.nav_option]()
 
 # Global Footer (if needed in all nav sections)
-st.markdown("""
-<div style="margin-top: 50px; padding: 20px; text-align: center; font-size: 12px; color: #666;">
-    © 2023 ScriptCraft AI. All rights reserved.
-</div>
-""", unsafe_allow_html=True)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
@@ -0,0 +1,186 @@
+import os
+import random
+import threading
+import time
+from google.api_core import exceptions as api_exceptions
+import gemini_client
+
+# A backend is any object with the GenerativeModel call used by the engine:
+#   generate_content(prompt, generation_config=None, stream=False) -> response
+# where response.text is the full text and, when streaming, iterating yields chunks with .text.
+# With candidate_count > 1 in the config, each of response.candidates has its text in content.parts.
+# It also has warm_up(), called once at startup, and a model_name used in telemetry.
+
+
+# The real Gemini API, through the shared client registry
+class GeminiBackend:
+    def __init__(self, model_name=gemini_client.DEFAULT_MODEL):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        return gemini_client.get_model(self.model_name).generate_content(
+            prompt, generation_config=generation_config, stream=stream
+        )
+
+    def warm_up(self):
+        gemini_client.warm_up(self.model_name)
+
+
+class _FakeFinishReason:
+    def __init__(self, name):
+        self.name = name
+
+
+class _FakePart:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeContent:
+    def __init__(self, text):
+        self.parts = [_FakePart(text)]
+
+
+class _FakeCandidate:
+    def __init__(self, finish_reason, text=""):
+        self.finish_reason = _FakeFinishReason(finish_reason)
+        self.content = _FakeContent(text)
+
+
+class _FakeChunk:
+    def __init__(self, text, finish_reason=None):
+        self.text = text
+        self.candidates = [_FakeCandidate(finish_reason)] if finish_reason else []
+
+
+class _FakeResponse:
+    def __init__(self, chunks, chunk_interval, candidates=None):
+        self._chunks = chunks
+        self._chunk_interval = chunk_interval
+        self.candidates = candidates or chunks[-1].candidates
+
+    @property
+    def text(self):
+        return "".join(chunk.text for chunk in self._chunks)
+
+    def __iter__(self):
+        for i, chunk in enumerate(self._chunks):
+            if i:
+                time.sleep(self._chunk_interval)
+            yield chunk
+
+
+def _max_output_tokens(generation_config):
+    if generation_config is None:
+        return 1024
+    if isinstance(generation_config, dict):
+        return generation_config.get("max_output_tokens") or 1024
+    return getattr(generation_config, "max_output_tokens", None) or 1024
+
+
+def _candidate_count(generation_config):
+    if isinstance(generation_config, dict):
+        return generation_config.get("candidate_count") or 1
+    return getattr(generation_config, "candidate_count", None) or 1
+
+
+# Local stand-in for the Gemini API with configurable latency, jitter, streaming rate and
+# injected errors; used for benchmarks and offline development (SCRIPT_BACKEND=fake).
+# Requests for more than max_candidates candidates are rejected like the API does.
+class FakeBackend:
+    SECTION_HEADINGS = ["## Hook", "## Main content", "## Call to action"]
+
+    def __init__(self, latency=0.8, jitter=0.2, chunk_interval=0.05, tokens_per_chunk=20, error_rate=0.0, seed=None, model_name="fake", max_candidates=8):
+        self.model_name = model_name
+        self.max_candidates = max_candidates
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_interval = chunk_interval
+        self.tokens_per_chunk = tokens_per_chunk
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            error = self._random.random() < self.error_rate
+            error_type = self._random.choice([api_exceptions.ResourceExhausted, api_exceptions.ServiceUnavailable])
+        return delay, error, error_type
+
+    def _chunks(self, prompt, max_output_tokens, variant=0):
+        # Roughly 0.75 words per token, capped at what the budget allows
+        words = max(20, int(max_output_tokens * 0.6))
+        body = [f"take{variant + 1}word{i}" if variant else f"word{i}" for i in range(words)]
+        text = f"{self.SECTION_HEADINGS[0]}\n" + " ".join(body[:words // 3]) + \
+            f"\n\n{self.SECTION_HEADINGS[1]}\n" + " ".join(body[words // 3:2 * words // 3]) + \
+            f"\n\n{self.SECTION_HEADINGS[2]}\n" + " ".join(body[2 * words // 3:])
+        size = max(1, self.tokens_per_chunk * 4)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        return [_FakeChunk(piece) for piece in pieces[:-1]] + [_FakeChunk(pieces[-1], "STOP")]
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        delay, error, error_type = self._draw()
+        # Time to first token
+        time.sleep(delay)
+        if error:
+            raise error_type("Injected error from the fake backend")
+        candidate_count = _candidate_count(generation_config)
+        if candidate_count > self.max_candidates:
+            raise api_exceptions.InvalidArgument(f"candidate_count must be at most {self.max_candidates}")
+        chunks = self._chunks(prompt, _max_output_tokens(generation_config))
+        if not stream:
+            time.sleep(self.chunk_interval * (len(chunks) - 1))
+        candidates = None
+        if candidate_count > 1:
+            candidates = [
+                _FakeCandidate("STOP", "".join(chunk.text for chunk in self._chunks(prompt, _max_output_tokens(generation_config), variant)))
+                for variant in range(candidate_count)
+            ]
+        return _FakeResponse(chunks, self.chunk_interval, candidates)
+
+    def warm_up(self):
+        pass
+
+
+PRIMARY = "primary"
+FAST = "fast"
+
+_backends = {}
+_backend_lock = threading.Lock()
+
+
+# Function to build the backend for a role ("primary" or "fast") selected by SCRIPT_BACKEND ("gemini" or "fake")
+def _backend_from_env(role):
+    if os.getenv("SCRIPT_BACKEND", "gemini").lower() == "fake":
+        latency_env, default_latency = ("FAKE_FAST_LATENCY_MS", 300) if role == FAST else ("FAKE_LATENCY_MS", 800)
+        return FakeBackend(
+            latency=float(os.getenv(latency_env, default_latency)) / 1000,
+            jitter=float(os.getenv("FAKE_JITTER_MS", 200)) / 1000,
+            chunk_interval=float(os.getenv("FAKE_CHUNK_INTERVAL_MS", 50)) / 1000,
+            tokens_per_chunk=int(os.getenv("FAKE_TOKENS_PER_CHUNK", 20)),
+            error_rate=float(os.getenv("FAKE_ERROR_RATE", 0)),
+            model_name="fake-fast" if role == FAST else "fake",
+            max_candidates=int(os.getenv("FAKE_MAX_CANDIDATES", 8))
+        )
+    if role == FAST:
+        return GeminiBackend(os.getenv("GEMINI_FAST_MODEL", gemini_client.FAST_MODEL))
+    return GeminiBackend(os.getenv("GEMINI_MODEL", gemini_client.DEFAULT_MODEL))
+
+
+# Function to get the process-wide model backend for a role
+def get_backend(role=PRIMARY):
+    with _backend_lock:
+        backend = _backends.get(role)
+        if backend is None:
+            gemini_client.load_environment()
+            backend = _backends[role] = _backend_from_env(role)
+        return backend
+
+
+# Function to replace the process-wide backend for a role (benchmarks, offline runs)
+def set_backend(backend, role=PRIMARY):
+    with _backend_lock:
+        _backends[role] = backend
@@ -0,0 +1,119 @@
+import argparse
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from script_engine import generate_text
+from scheduler import BATCH
+
+DEFAULT_WORKERS = 4
+MAX_WORKERS = 16
+# Batch rows are scheduled as one user at the lowest priority (see scheduler); each run is one request,
+# so its worker count, not the per-user cap or token quota, sets how many rows reach the model at once
+BATCH_USER_ID = "batch"
+
+# Input columns; optional ones are filled with the same defaults as generate_script
+REQUIRED_COLUMNS = ["title", "content_type"]
+OPTIONAL_COLUMNS = {
+    "tone": "casual",
+    "duration": "medium",
+    "target_audience": "general",
+}
+
+
+def _is_parquet(name):
+    return os.path.splitext(str(name))[1].lower() in (".parquet", ".pq")
+
+
+# Function to read batch rows from a CSV or Parquet path / uploaded file
+def read_rows(source, name=None):
+    if _is_parquet(name or source):
+        df = pd.read_parquet(source)
+    else:
+        df = pd.read_csv(source)
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    for column, default in OPTIONAL_COLUMNS.items():
+        if column not in df.columns:
+            df[column] = default
+        df[column] = df[column].fillna(default)
+    return df
+
+
+# Function to write batch results next to the input rows, format picked from the extension
+def write_results(df, path):
+    if _is_parquet(path):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+# Function to generate one row, returning its script, error and latency
+def _generate_row(row, use_cache, group):
+    started = time.perf_counter()
+    result = generate_text(
+        row["content_type"],
+        row["title"],
+        row["tone"],
+        row["duration"],
+        row["target_audience"],
+        use_cache=use_cache,
+        user_id=BATCH_USER_ID,
+        priority=BATCH,
+        group=group
+    )
+    return result.text, result.error, round(time.perf_counter() - started, 3)
+
+
+# Function to run generate_text over every row with a bounded thread pool.
+# on_progress(done, total) is called from the calling thread as rows finish.
+def run_batch(df, max_workers=DEFAULT_WORKERS, use_cache=True, on_progress=None):
+    max_workers = max(1, min(int(max_workers), MAX_WORKERS))
+    rows = df.to_dict("records")
+    results = [None] * len(rows)
+    group = uuid.uuid4().hex
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_generate_row, row, use_cache, group): i for i, row in enumerate(rows)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_progress:
+                on_progress(done, len(rows))
+
+    output = df.copy()
+    output["script"] = [result[0] for result in results]
+    output["error"] = [result[1] for result in results]
+    output["latency_seconds"] = [result[2] for result in results]
+    return output
+
+
+# Headless entry point: python batch.py scripts.csv results.csv --workers 8
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate scripts for every row of a CSV/Parquet file")
+    parser.add_argument("input", help="CSV or Parquet file with title, content_type[, tone, duration, target_audience]")
+    parser.add_argument("output", help="CSV or Parquet file to write results to")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"concurrent requests (max {MAX_WORKERS})")
+    parser.add_argument("--no-cache", action="store_true", help="always call the model, even for cached rows")
+    args = parser.parse_args(argv)
+
+    df = read_rows(args.input)
+
+    def report(done, total):
+        print(f"\r{done}/{total} rows done", end="", flush=True)
+
+    output = run_batch(df, max_workers=args.workers, use_cache=not args.no_cache, on_progress=report)
+    print()
+    write_results(output, args.output)
+
+    failed = int(output["error"].notna().sum())
+    print(f"Wrote {len(output)} rows to {args.output} ({failed} failed, "
+          f"median latency {output['latency_seconds'].median():.2f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
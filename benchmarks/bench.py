@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep every store in a scratch directory and lift the quota so the benchmark measures the app, not the limiter
+SCRATCH_DIR = tempfile.mkdtemp(prefix="scriptcraft-bench-")
+os.environ.update({
+    "SCRIPT_BACKEND": "fake",
+    "SCRIPT_CACHE_PATH": os.path.join(SCRATCH_DIR, "cache.db"),
+    "SCRIPT_HISTORY_PATH": os.path.join(SCRATCH_DIR, "history.db"),
+    "SCRIPT_USAGE_PATH": os.path.join(SCRATCH_DIR, "usage.db"),
+    "SCRIPT_TITLE_INDEX_PATH": os.path.join(SCRATCH_DIR, "titles.db"),
+    "SCRIPT_SESSION_SPILL_PATH": os.path.join(SCRATCH_DIR, "sessions.db"),
+    "SCRIPT_TELEMETRY_PATH": os.path.join(SCRATCH_DIR, "telemetry.jsonl"),
+    "GEMINI_RATE_LIMIT_PATH": os.path.join(SCRATCH_DIR, "rate_limit.db"),
+    "GEMINI_REQUESTS_PER_MINUTE": "1000000",
+    "GEMINI_BURST": "1000",
+})
+
+import pandas as pd
+from backends import FAST, FakeBackend, set_backend
+from batch import run_batch
+from history_store import get_history_store
+from telemetry import get_telemetry
+from script_engine import stream_script, generate_text
+
+BENCH_USER = "bench-user"
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 2),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p95_ms": round(pick(0.95) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+# Uncached single-request latency, end to end through the engine
+def bench_single_request(runs):
+    samples = []
+    for i in range(runs):
+        started = time.perf_counter()
+        result = generate_text("youtube", f"single request {i}", duration="3-5 minutes", use_cache=False)
+        samples.append(time.perf_counter() - started)
+        assert result.ok, result.error
+    return _percentiles(samples)
+
+
+# Time from the call until the first streamed text reaches the caller
+def bench_time_to_first_token(runs):
+    first_token, total = [], []
+    for i in range(runs):
+        started = time.perf_counter()
+        first = None
+        for _ in stream_script("instagram", f"ttft {i}", duration="30 seconds", use_cache=False):
+            if first is None:
+                first = time.perf_counter() - started
+        first_token.append(first)
+        total.append(time.perf_counter() - started)
+    return {"time_to_first_token": _percentiles(first_token), "total": _percentiles(total)}
+
+
+# Batch throughput (rows/second) at several worker counts
+def bench_batch_throughput(rows, concurrency_levels):
+    results = []
+    for workers in concurrency_levels:
+        df = pd.DataFrame({
+            "title": [f"batch {workers} row {i}" for i in range(rows)],
+            "content_type": ["youtube"] * rows,
+            "tone": ["casual"] * rows,
+            "duration": ["3-5 minutes"] * rows,
+            "target_audience": ["general"] * rows,
+        })
+        started = time.perf_counter()
+        output = run_batch(df, max_workers=workers, use_cache=False)
+        elapsed = time.perf_counter() - started
+        results.append({
+            "workers": workers,
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 2),
+            "failed": int(output["error"].notna().sum()),
+        })
+    return results
+
+
+# Code run in a fresh interpreter to time the first run of app.py (imports, setup, first render)
+COLD_START_CODE = """
+import json, sys, time
+# streamlit run puts the script's directory on sys.path; AppTest doesn't
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_ready = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+finished = time.perf_counter()
+if at.exception:
+    raise SystemExit(f"app.py raised: {{at.exception}}")
+print(json.dumps({{"streamlit_import": streamlit_ready - started, "first_run": finished - streamlit_ready}}))
+"""
+
+
+# Time to the first rendered page in a fresh process, split into the Streamlit import and app.py's first run
+def bench_cold_start(runs):
+    streamlit_import, first_run = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START_CODE.format(root=ROOT, app=os.path.join(ROOT, "app.py"))],
+            cwd=SCRATCH_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        streamlit_import.append(timings["streamlit_import"])
+        first_run.append(timings["first_run"])
+    return {"streamlit_import": _percentiles(streamlit_import), "first_run": _percentiles(first_run)}
+
+
+# Cost of a full Streamlit run of app.py on each page, at several history sizes
+def bench_app_rerun(history_sizes, reruns):
+    from streamlit.testing.v1 import AppTest
+
+    store = get_history_store()
+    saved = 0
+    script = "## Hook\n" + "lorem ipsum " * 200
+    results = []
+    for size in history_sizes:
+        while saved < size:
+            store.save(BENCH_USER, "youtube", f"history item {saved}", script)
+            saved += 1
+        for page in ["Create Script", "My Scripts"]:
+            started = time.perf_counter()
+            at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+            at.query_params["uid"] = BENCH_USER
+            at.session_state["nav_option"] = page
+            at.run()
+            cold = time.perf_counter() - started
+            if at.exception:
+                raise RuntimeError(f"app.py raised on {page}: {at.exception}")
+            samples = []
+            for _ in range(reruns):
+                started = time.perf_counter()
+                at.run()
+                samples.append(time.perf_counter() - started)
+            results.append({"history_size": size, "page": page, "first_run_ms": round(cold * 1000, 2), "rerun": _percentiles(samples)})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ScriptCraft AI against a local fake model backend")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--fast-latency-ms", type=float, default=100, help="time to first token of the fast model")
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--chunk-interval-ms", type=float, default=10)
+    parser.add_argument("--tokens-per-chunk", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--batch-rows", type=int, default=32)
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    parser.add_argument("--history-sizes", default="0,100,1000,10000")
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--cold-starts", type=int, default=3)
+    parser.add_argument("--skip-model", action="store_true", help="skip the generation latency and throughput benchmarks")
+    parser.add_argument("--skip-app", action="store_true", help="skip the Streamlit cold start and rerun benchmarks")
+    args = parser.parse_args(argv)
+
+    backend = FakeBackend(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        chunk_interval=args.chunk_interval_ms / 1000,
+        tokens_per_chunk=args.tokens_per_chunk,
+        error_rate=args.error_rate,
+        seed=42
+    )
+    fast_backend = FakeBackend(
+        latency=args.fast_latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        chunk_interval=args.chunk_interval_ms / 1000,
+        tokens_per_chunk=args.tokens_per_chunk,
+        error_rate=args.error_rate,
+        seed=43,
+        model_name="fake-fast"
+    )
+    set_backend(backend)
+    set_backend(fast_backend, FAST)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+    }
+    if not args.skip_model:
+        report["single_request"] = bench_single_request(args.runs)
+        report["streaming"] = bench_time_to_first_token(args.runs)
+        report["batch_throughput"] = bench_batch_throughput(args.batch_rows, [int(n) for n in args.concurrency.split(",")])
+    if not args.skip_app:
+        report["cold_start"] = bench_cold_start(args.cold_starts)
+        report["app_rerun"] = bench_app_rerun([int(n) for n in args.history_sizes.split(",")], args.reruns)
+    report["backend_calls"] = {"primary": backend.calls, "fast": fast_backend.calls}
+    routes = get_telemetry().routes()
+    report["routes"] = routes.to_dict(orient="records") if not routes.empty else []
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SHARED_USER = "stress-shared"
+# Rate limit used by the stress run: tight enough that the processes have to queue for tokens
+DEFAULT_REQUESTS_PER_MINUTE = 300
+DEFAULT_BURST = 5
+
+
+# Function to build the environment every worker shares: one scratch directory for all stores,
+# the fake backend, and the scheduler caps lifted so only the shared rate limiter throttles
+def worker_environment(scratch_dir, args):
+    env = dict(os.environ)
+    env.update({
+        "SCRIPT_BACKEND": "fake",
+        "FAKE_LATENCY_MS": str(args.latency_ms),
+        "FAKE_FAST_LATENCY_MS": str(args.latency_ms),
+        "FAKE_JITTER_MS": "5",
+        "FAKE_CHUNK_INTERVAL_MS": "1",
+        "SCRIPT_CACHE_PATH": os.path.join(scratch_dir, "cache.db"),
+        "SCRIPT_HISTORY_PATH": os.path.join(scratch_dir, "history.db"),
+        "SCRIPT_USAGE_PATH": os.path.join(scratch_dir, "usage.db"),
+        "SCRIPT_TITLE_INDEX_PATH": os.path.join(scratch_dir, "titles.db"),
+        "SCRIPT_TELEMETRY_PATH": os.path.join(scratch_dir, "telemetry.jsonl"),
+        "GEMINI_RATE_LIMIT_PATH": "" if args.per_process_bucket else os.path.join(scratch_dir, "rate_limit.db"),
+        "GEMINI_REQUESTS_PER_MINUTE": str(args.requests_per_minute),
+        "GEMINI_BURST": str(args.burst),
+        "SCRIPT_SCHEDULER_MAX_CONCURRENT": "1000",
+        "SCRIPT_USER_MAX_CONCURRENT": "1000",
+        "SCRIPT_USER_TOKENS_PER_MINUTE": "1000000000",
+    })
+    return env
+
+
+# One worker process: generate requests scripts (every other one on a title all workers share, so
+# they meet in the cache), save each to the worker's own history and the shared user's, and
+# report every rate-limit token taken as a JSON line on stdout
+def run_worker(index, requests, shared_titles, start_at):
+    from resilience import get_rate_limiter
+    from history_store import get_history_store
+    from script_engine import generate_text
+
+    limiter = get_rate_limiter()
+    acquire = limiter.acquire
+    acquired = []
+
+    def timed_acquire(timeout=None):
+        ok = acquire(timeout=timeout)
+        if ok:
+            acquired.append(time.time())
+        return ok
+
+    limiter.acquire = timed_acquire
+    history = get_history_store()
+    user_id = f"stress-user-{index}"
+    saved = []
+    errors = []
+    time.sleep(max(0.0, start_at - time.time()))
+    for i in range(requests):
+        title = f"shared topic {i % shared_titles}" if i % 2 else f"worker {index} topic {i}"
+        result = generate_text("instagram", title, duration="15 seconds")
+        if not result.ok:
+            errors.append(f"{result.error_kind}: {result.error}")
+            continue
+        try:
+            saved.append([user_id, history.save(user_id, "instagram", title, result.text), title])
+            saved.append([SHARED_USER, history.save(SHARED_USER, "instagram", title, result.text), title])
+        except Exception as e:
+            errors.append(f"history: {e}")
+    print(json.dumps({"worker": index, "acquired": acquired, "saved": saved, "errors": errors}))
+
+
+# Function to find the worst overdraft of the token bucket: for every window between two takes,
+# how many more tokens were taken than capacity + rate * window allows
+def bucket_overdraft(timestamps, rate_per_second, capacity):
+    ordered = sorted(timestamps)
+    worst = 0.0
+    for i in range(len(ordered)):
+        for j in range(i, len(ordered)):
+            worst = max(worst, (j - i + 1) - capacity - rate_per_second * (ordered[j] - ordered[i]))
+    return round(worst, 2)
+
+
+# Function to check the stores after every worker has finished
+def check_results(reports, args):
+    from script_cache import get_cache, make_cache_key
+    from history_store import get_history_store
+
+    errors = [error for report in reports for error in report["errors"]]
+    saved = [entry for report in reports for entry in report["saved"]]
+    history = get_history_store()
+    ids = [script_id for _, script_id, _ in saved]
+    missing = [entry for entry in saved if (history.get(entry[0], entry[1]) or {}).get("title") != entry[2]]
+    expected_per_user = args.requests
+    user_counts = {f"stress-user-{i}": history.count(f"stress-user-{i}") for i in range(args.processes)}
+
+    cache = get_cache()
+    titles = {title for _, _, title in saved}
+    uncached = [title for title in titles if not cache.contains(make_cache_key("instagram", title, "casual", "15 seconds", "general"))]
+    stats = cache.stats()
+    lookups = args.processes * args.requests
+
+    acquired = [timestamp for report in reports for timestamp in report["acquired"]]
+    overdraft = bucket_overdraft(acquired, args.requests_per_minute / 60, args.burst)
+    checks = {
+        "no_errors": not errors,
+        "history_ids_unique": len(ids) == len(set(ids)),
+        "history_entries_readable": not missing,
+        "history_counts": all(count == expected_per_user for count in user_counts.values())
+                          and history.count(SHARED_USER) == args.processes * args.requests,
+        "cache_has_every_title": not uncached,
+        "cache_counters_exact": stats["hits"] + stats["misses"] == lookups,
+        # One token of slack for clock reads taken just outside the bucket's transaction
+        "rate_limit_respected": overdraft <= 1,
+    }
+    return {
+        "checks": checks,
+        "errors": errors[:10],
+        "history": {"saved": len(saved), "per_user": user_counts, "shared_user": history.count(SHARED_USER)},
+        "cache": {"lookups": lookups, **stats},
+        "rate_limit": {
+            "tokens_taken": len(acquired),
+            "allowed_per_second": round(args.requests_per_minute / 60, 2),
+            "burst": args.burst,
+            "observed_per_second": round(len(acquired) / (max(acquired) - min(acquired)), 2) if len(acquired) > 1 else None,
+            "worst_overdraft": overdraft,
+        },
+    }
+
+
+# Stress test: N processes generate at once against one set of store files; exits 1 if a check fails.
+#   python benchmarks/stress_shared_state.py --processes 8 --requests 25
+# --per-process-bucket runs the same load with a token bucket per process, to show the quota overrun.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress the shared cache, rate limiter and history store from several processes")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=25, help="generations per process")
+    parser.add_argument("--shared-titles", type=int, default=5, help="titles every process requests")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--requests-per-minute", type=float, default=DEFAULT_REQUESTS_PER_MINUTE)
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST)
+    parser.add_argument("--per-process-bucket", action="store_true", help="give every process its own token bucket")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        run_worker(args.worker, args.requests, args.shared_titles, args.start_at)
+        return
+
+    scratch_dir = tempfile.mkdtemp(prefix="scriptcraft-stress-")
+    env = worker_environment(scratch_dir, args)
+    # Start every worker at the same moment, once they have all had time to import
+    start_at = time.time() + 5
+    forwarded = [
+        "--requests", str(args.requests), "--shared-titles", str(args.shared_titles), "--start-at", str(start_at)
+    ]
+    workers = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(i)] + forwarded,
+            env=env, cwd=scratch_dir, stdout=subprocess.PIPE, text=True
+        )
+        for i in range(args.processes)
+    ]
+    reports = []
+    for worker in workers:
+        output, _ = worker.communicate()
+        if worker.returncode != 0:
+            raise SystemExit(f"worker exited with {worker.returncode}")
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+    elapsed = time.time() - start_at
+
+    # Read the stores back in this process with the workers' settings
+    os.environ.update(env)
+    report = {"processes": args.processes, "requests": args.requests, "scratch_dir": scratch_dir, "seconds": round(elapsed, 2)}
+    report.update(check_results(reports, args))
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if all(report["checks"].values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import os
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from sqlite_store import connect
+
+# Speaking rate used to turn a duration into a word count
+WORDS_PER_MINUTE = 150
+# Average Gemini tokens per English word
+TOKENS_PER_WORD = 1.35
+# Extra output on top of the spoken words: headings, [visual/B-roll notes], timestamps
+FORMAT_OVERHEAD = {
+    "instagram": 2.0,
+    "youtube": 1.5,
+}
+# Podcast output is a question plan, not a transcript: words of plan per episode minute
+PODCAST_WORDS_PER_MINUTE = 18
+
+MIN_OUTPUT_TOKENS = 384
+MAX_OUTPUT_TOKENS = 8192
+
+# Minutes assumed for the generic duration labels
+GENERIC_DURATIONS = {
+    "instagram": {"short": 0.25, "medium": 0.5, "long": 1},
+    "youtube": {"short": 4, "medium": 7.5, "long": 12.5},
+    "podcast": {"short": 25, "medium": 37.5, "long": 52.5},
+}
+
+
+@dataclass(frozen=True)
+class Budget:
+    minutes: float
+    target_words: int
+    max_output_tokens: int
+
+
+# Function to turn a duration label ("15 seconds", "3-5 minutes", "15+ minutes", "Medium") into minutes
+def duration_minutes(content_type, duration):
+    label = str(duration).strip().lower()
+    numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", label)]
+    if not numbers:
+        return GENERIC_DURATIONS.get(content_type, GENERIC_DURATIONS["youtube"]).get(label, GENERIC_DURATIONS["youtube"]["medium"])
+    if len(numbers) >= 2:
+        minutes = (numbers[0] + numbers[1]) / 2
+    elif "+" in label:
+        # Open-ended ranges: assume a quarter beyond the lower bound
+        minutes = numbers[0] * 1.25
+    else:
+        minutes = numbers[0]
+    return minutes / 60 if "second" in label else minutes
+
+
+# Function to compute the word target and output token budget for a request
+@lru_cache(maxsize=256)
+def get_budget(content_type, duration):
+    minutes = duration_minutes(content_type, duration)
+    if content_type == "podcast":
+        target_words = minutes * PODCAST_WORDS_PER_MINUTE
+        output_words = target_words * 1.2
+    else:
+        target_words = minutes * WORDS_PER_MINUTE
+        output_words = target_words * FORMAT_OVERHEAD.get(content_type, 1.3)
+    max_output_tokens = int(output_words * TOKENS_PER_WORD)
+    return Budget(
+        minutes=minutes,
+        target_words=max(30, int(round(target_words, -1))),
+        max_output_tokens=max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, max_output_tokens))
+    )
+
+
+# Aggregated real token usage per (content_type, duration), used to tune the table above
+class UsageStats:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        with connect(self.path, rows=True) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS token_usage (
+                    content_type TEXT NOT NULL,
+                    duration TEXT NOT NULL,
+                    budget_tokens INTEGER NOT NULL,
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    output_tokens INTEGER NOT NULL DEFAULT 0,
+                    max_output_tokens INTEGER NOT NULL DEFAULT 0,
+                    truncated INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (content_type, duration)
+                )
+            """)
+
+    def record(self, content_type, duration, budget_tokens, output_tokens, truncated):
+        with self._lock, connect(self.path, rows=True) as conn:
+            conn.execute("""
+                INSERT INTO token_usage (content_type, duration, budget_tokens, requests, output_tokens, max_output_tokens, truncated)
+                VALUES (?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT (content_type, duration) DO UPDATE SET
+                    budget_tokens = excluded.budget_tokens,
+                    requests = requests + 1,
+                    output_tokens = output_tokens + excluded.output_tokens,
+                    max_output_tokens = MAX(max_output_tokens, excluded.max_output_tokens),
+                    truncated = truncated + excluded.truncated
+            """, (content_type, str(duration), budget_tokens, output_tokens, output_tokens, int(bool(truncated))))
+
+    # Return budget vs. actual usage rows, with the share of responses cut off by the budget
+    def report(self):
+        with connect(self.path, rows=True) as conn:
+            rows = conn.execute("SELECT * FROM token_usage ORDER BY content_type, duration").fetchall()
+        return [
+            {
+                "content_type": row["content_type"],
+                "duration": row["duration"],
+                "budget_tokens": row["budget_tokens"],
+                "requests": row["requests"],
+                "avg_output_tokens": round(row["output_tokens"] / row["requests"]),
+                "max_output_tokens": row["max_output_tokens"],
+                "truncated_rate": round(row["truncated"] / row["requests"], 3),
+            }
+            for row in rows
+        ]
+
+
+_usage_stats = None
+_usage_lock = threading.Lock()
+
+
+# Function to get the process-wide usage recorder
+def get_usage_stats():
+    global _usage_stats
+    with _usage_lock:
+        if _usage_stats is None:
+            _usage_stats = UsageStats(os.getenv("SCRIPT_USAGE_PATH", "script_usage.db"))
+        return _usage_stats
+
+
+# Print the usage report: python budgets.py
+if __name__ == "__main__":
+    for row in get_usage_stats().report():
+        print(row)
@@ -0,0 +1,93 @@
+import argparse
+import json
+import sys
+from script_engine import CONTENT_TYPES, generate_text
+from history_store import get_history_store
+from exporter import EXPORT_FORMATS, write_export
+import gemini_client
+import server
+
+
+def _generate(args):
+    result = generate_text(
+        args.content_type,
+        args.title,
+        args.tone,
+        args.duration,
+        args.target_audience,
+        use_cache=not args.no_cache,
+        reuse_similar=args.reuse_similar,
+        user_id="cli"
+    )
+    if args.json:
+        print(json.dumps(server.result_payload(result)))
+    elif result.ok:
+        print(result.text)
+    else:
+        print(f"{result.error_kind}: {result.error}", file=sys.stderr)
+    return 0 if result.ok else 1
+
+
+def _export(args):
+    fmt = args.format or next(
+        (name for name, spec in EXPORT_FORMATS.items() if args.output.endswith("." + spec["extension"])), "jsonl"
+    )
+    batches = get_history_store().iter_batches(args.user_id)
+    if args.output == "-":
+        write_export(batches, fmt, sys.stdout.buffer)
+    else:
+        with open(args.output, "wb") as f:
+            write_export(batches, fmt, f)
+    return 0
+
+
+# Command line entry point sharing the app's engine, cache and rate limiter:
+#   python cli.py generate youtube "10 tips for better sleep" --duration "5-10 minutes"
+#   python cli.py batch scripts.csv results.csv --workers 8
+#   python cli.py export <user id> scripts.zip
+#   python cli.py serve --port 8600
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ScriptCraft AI headless script generation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="generate one script and print it")
+    generate_parser.add_argument("content_type", choices=CONTENT_TYPES)
+    generate_parser.add_argument("title")
+    generate_parser.add_argument("--tone", default="casual")
+    generate_parser.add_argument("--duration", default="medium")
+    generate_parser.add_argument("--target-audience", default="general")
+    generate_parser.add_argument("--no-cache", action="store_true", help="always call the model")
+    generate_parser.add_argument("--reuse-similar", action="store_true", help="reuse a cached script for a near-duplicate title")
+    generate_parser.add_argument("--json", action="store_true", help="print a JSON object instead of the script text")
+
+    commands.add_parser("batch", help="generate every row of a CSV/Parquet file", add_help=False)
+
+    export_parser = commands.add_parser("export", help="export a user's whole history to a file")
+    export_parser.add_argument("user_id")
+    export_parser.add_argument("output", help="output file; - for stdout")
+    export_parser.add_argument("--format", choices=list(EXPORT_FORMATS), help="defaults to the output file's extension")
+
+    serve_parser = commands.add_parser("serve", help="run the JSON HTTP service")
+    serve_parser.add_argument("--host", default=server.DEFAULT_HOST)
+    serve_parser.add_argument("--port", type=int, default=server.DEFAULT_PORT)
+
+    argv = sys.argv[1:] if argv is None else argv
+    # batch keeps its own argument parser
+    if argv and argv[0] == "batch":
+        # Imported here so generate/serve don't load pandas
+        import batch
+        gemini_client.load_environment()
+        return batch.main(argv[1:])
+
+    args = parser.parse_args(argv)
+    gemini_client.load_environment()
+    if args.command == "generate":
+        return _generate(args)
+    if args.command == "export":
+        return _export(args)
+    server.serve(args.host, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
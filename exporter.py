@@ -0,0 +1,58 @@
+import json
+import re
+import zipfile
+
+# Bulk export formats, with their label, file extension and MIME type
+EXPORT_FORMATS = {
+    "jsonl": {"label": "JSON Lines", "extension": "jsonl", "mime": "application/x-ndjson"},
+    "csv": {"label": "CSV", "extension": "csv", "mime": "text/csv"},
+    "markdown": {"label": "Markdown", "extension": "md", "mime": "text/markdown"},
+    "zip": {"label": "ZIP (one Markdown file per script)", "extension": "zip", "mime": "application/zip"},
+}
+EXPORT_COLUMNS = ["id", "timestamp", "content_type", "title", "script"]
+
+
+# Function to turn a title into a safe file name stem
+def slugify(title, limit=60):
+    slug = re.sub(r"[^\w]+", "-", str(title).lower()).strip("-")
+    return slug[:limit].rstrip("-") or "script"
+
+
+# Function to get the file name of a single script download
+def script_filename(title, extension="md"):
+    return f"{slugify(title)}.{extension}"
+
+
+# Function to render one history entry as a Markdown document
+def script_markdown(item):
+    return f"# {item['title']}\n\n_{item['content_type'].title()} • {item['timestamp']}_\n\n{item['script'].strip()}\n"
+
+
+# Generator yielding the export as text chunks, one per history batch (jsonl, csv or markdown)
+def iter_export(batches, fmt):
+    if fmt == "jsonl":
+        for batch in batches:
+            yield "".join(json.dumps({column: item[column] for column in EXPORT_COLUMNS}) + "\n" for item in batch)
+    elif fmt == "csv":
+        # pandas takes a second to import, so only CSV exports load it
+        import pandas as pd
+        for i, batch in enumerate(batches):
+            yield pd.DataFrame(batch, columns=EXPORT_COLUMNS).to_csv(index=False, header=i == 0)
+    elif fmt == "markdown":
+        for i, batch in enumerate(batches):
+            yield ("" if i == 0 else "\n---\n\n") + "\n---\n\n".join(script_markdown(item) for item in batch)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+# Function to write an export to a binary file object batch by batch; ZIP exports hold one
+# Markdown file per script. The file object doesn't need to be seekable (e.g. an HTTP response).
+def write_export(batches, fmt, fileobj):
+    if fmt == "zip":
+        with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for batch in batches:
+                for item in batch:
+                    archive.writestr(f"{item['id']:06d}-{slugify(item['title'])}.md", script_markdown(item))
+        return
+    for chunk in iter_export(batches, fmt):
+        fileobj.write(chunk.encode("utf-8"))
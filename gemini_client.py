@@ -0,0 +1,101 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+# google.generativeai takes over a second to import, so it is imported on first use
+# (normally on the warm-up thread) instead of on the app's startup path
+
+DEFAULT_MODEL = "gemini-1.5-pro"
+# Lower-latency model used for fast routes and hedged requests
+FAST_MODEL = "gemini-1.5-flash"
+
+# Sampling settings shared by every generation
+BASE_GENERATION_SETTINGS = {
+    "temperature": 0.7,
+    "top_k": 40,
+    "top_p": 0.95,
+}
+
+# Process-wide registry; module state is kept across Streamlit reruns and sessions
+_lock = threading.Lock()
+_env_loaded = False
+_configured = False
+_models = {}
+_generation_configs = {}
+_warm_up_thread = None
+
+
+# Function to load .env into the process environment once
+def load_environment():
+    global _env_loaded
+    with _lock:
+        if not _env_loaded:
+            load_dotenv()
+            _env_loaded = True
+
+
+# Function to load the API key and configure the SDK once per process
+def configure():
+    global _configured
+    load_environment()
+    with _lock:
+        if _configured:
+            return
+        import google.generativeai as genai
+        # The SDK keeps one client (and its gRPC channel) per process after this call,
+        # so every model below shares the same pooled connection
+        genai.configure(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            transport=os.getenv("GEMINI_TRANSPORT", "grpc")
+        )
+        _configured = True
+
+
+# Function to get a shared GenerativeModel instance by name
+def get_model(name=DEFAULT_MODEL):
+    configure()
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            import google.generativeai as genai
+            model = genai.GenerativeModel(name)
+            _models[name] = model
+        return model
+
+
+# Function to get a prebuilt GenerationConfig for an output token budget and number of candidates
+def get_generation_config(max_output_tokens, candidate_count=1):
+    with _lock:
+        config = _generation_configs.get((max_output_tokens, candidate_count))
+        if config is None:
+            import google.generativeai as genai
+            config = genai.types.GenerationConfig(
+                max_output_tokens=max_output_tokens,
+                candidate_count=candidate_count,
+                **BASE_GENERATION_SETTINGS
+            )
+            _generation_configs[(max_output_tokens, candidate_count)] = config
+        return config
+
+
+def _warm_up(name):
+    try:
+        model = get_model(name)
+        # count_tokens in this SDK version doesn't create the client on its own
+        if model._client is None:
+            from google.generativeai import client as genai_client
+            model._client = genai_client.get_default_generative_client()
+        model.count_tokens("ping")
+    except Exception:
+        # Warm-up is best effort; the first real generation will surface any problem
+        pass
+
+
+# Function to open the upstream connection in the background once per process
+def warm_up(name=DEFAULT_MODEL):
+    global _warm_up_thread
+    with _lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up, args=(name,), daemon=True)
+            _warm_up_thread.start()
+        return _warm_up_thread
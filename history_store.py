@@ -0,0 +1,202 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from sqlite_store import connect
+
+# Default retention policy (override through the environment / .env)
+DEFAULT_MAX_SCRIPTS_PER_USER = 1000
+DEFAULT_MAX_AGE_DAYS = 180
+PREVIEW_CHARS = 280
+
+
+# Function to build the short preview shown on collapsed history entries
+def make_preview(script, limit=PREVIEW_CHARS):
+    text = " ".join(script.split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+# Function to turn free text into a safe FTS5 query (every word must match, as a prefix)
+def make_match_query(text):
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _format_timestamp(created_at):
+    return datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M")
+
+
+# Persistent script history, indexed by user, timestamp and content type
+class HistoryStore:
+    def __init__(self, path, max_scripts_per_user=DEFAULT_MAX_SCRIPTS_PER_USER, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = path
+        self.max_scripts_per_user = max_scripts_per_user
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        with connect(self.path, rows=True) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scripts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    content_type TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    preview TEXT NOT NULL,
+                    script TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scripts_user_created ON scripts(user_id, created_at DESC)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scripts_user_type_created ON scripts(user_id, content_type, created_at DESC)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scripts_created ON scripts(created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scripts_user_id ON scripts(user_id, id)")
+            
+            # Full-text index over title and script, kept in sync by triggers
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scripts_fts'"
+            ).fetchone()
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS scripts_fts USING fts5(
+                    title, script, content='scripts', content_rowid='id', tokenize='porter unicode61'
+                )
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS scripts_fts_insert AFTER INSERT ON scripts BEGIN
+                    INSERT INTO scripts_fts (rowid, title, script) VALUES (new.id, new.title, new.script);
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS scripts_fts_delete AFTER DELETE ON scripts BEGIN
+                    INSERT INTO scripts_fts (scripts_fts, rowid, title, script) VALUES ('delete', old.id, old.title, old.script);
+                END
+            """)
+            if not has_fts:
+                # Index scripts saved before the search index existed
+                conn.execute("INSERT INTO scripts_fts (scripts_fts) VALUES ('rebuild')")
+
+    def _summary(self, row):
+        return {
+            "id": row["id"],
+            "timestamp": _format_timestamp(row["created_at"]),
+            "content_type": row["content_type"],
+            "title": row["title"],
+            "preview": row["preview"],
+        }
+
+    # Save a script and apply the retention policy for its user; returns the new id
+    def save(self, user_id, content_type, title, script):
+        now = time.time()
+        with self._lock, connect(self.path, rows=True) as conn:
+            cursor = conn.execute(
+                "INSERT INTO scripts (user_id, created_at, content_type, title, preview, script) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, now, content_type, title, make_preview(script), script)
+            )
+            conn.execute("""
+                DELETE FROM scripts WHERE id IN (
+                    SELECT id FROM scripts WHERE user_id = ?
+                    ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (user_id, self.max_scripts_per_user))
+            conn.execute("DELETE FROM scripts WHERE created_at < ?", (now - self.max_age_days * 86400,))
+            return cursor.lastrowid
+
+    def count(self, user_id):
+        with connect(self.path, rows=True) as conn:
+            return conn.execute("SELECT COUNT(*) FROM scripts WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    # Return one page of summaries (no full script text), newest first
+    def page(self, user_id, page=1, page_size=10):
+        with connect(self.path, rows=True) as conn:
+            rows = conn.execute("""
+                SELECT id, created_at, content_type, title, preview FROM scripts
+                WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?
+            """, (user_id, page_size, (max(page, 1) - 1) * page_size)).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def recent(self, user_id, limit=3):
+        return self.page(user_id, 1, limit)
+
+    # Search a user's scripts by words in the title/body, with optional content type and
+    # date (timestamps, inclusive) filters; best matches first, or newest first without words
+    def search(self, user_id, text="", content_type=None, date_from=None, date_to=None, limit=50):
+        match_query = make_match_query(text)
+        conditions = ["s.user_id = ?"]
+        params = [user_id]
+        if content_type:
+            conditions.append("s.content_type = ?")
+            params.append(content_type)
+        if date_from is not None:
+            conditions.append("s.created_at >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("s.created_at <= ?")
+            params.append(date_to)
+        
+        if match_query:
+            sql = f"""
+                SELECT s.id, s.created_at, s.content_type, s.title,
+                       snippet(scripts_fts, 1, '**', '**', '…', 24) AS preview
+                FROM scripts_fts JOIN scripts s ON s.id = scripts_fts.rowid
+                WHERE scripts_fts MATCH ? AND {" AND ".join(conditions)}
+                ORDER BY rank LIMIT ?
+            """
+            params = [match_query] + params
+        else:
+            sql = f"""
+                SELECT s.id, s.created_at, s.content_type, s.title, s.preview FROM scripts s
+                WHERE {" AND ".join(conditions)}
+                ORDER BY s.created_at DESC, s.id DESC LIMIT ?
+            """
+        with connect(self.path, rows=True) as conn:
+            rows = conn.execute(sql, params + [limit]).fetchall()
+        return [self._summary(row) for row in rows]
+
+    # Yield every script of a user, oldest first, as lists of full entries (with script text) of at
+    # most batch_size. Pages are read by id (keyset), so memory stays flat however long the history is.
+    def iter_batches(self, user_id, batch_size=500):
+        last_id = 0
+        while True:
+            with connect(self.path, rows=True) as conn:
+                rows = conn.execute(
+                    "SELECT * FROM scripts WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                    (user_id, last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            batch = []
+            for row in rows:
+                item = self._summary(row)
+                item["script"] = row["script"]
+                batch.append(item)
+            last_id = rows[-1]["id"]
+            yield batch
+
+    # Return a full history entry including the script text, or None
+    def get(self, user_id, script_id):
+        with connect(self.path, rows=True) as conn:
+            row = conn.execute(
+                "SELECT * FROM scripts WHERE id = ? AND user_id = ?", (script_id, user_id)
+            ).fetchone()
+        if row is None:
+            return None
+        item = self._summary(row)
+        item["script"] = row["script"]
+        return item
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Function to get the process-wide history store (module state survives Streamlit reruns)
+def get_history_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore(
+                path=os.getenv("SCRIPT_HISTORY_PATH", "script_history.db"),
+                max_scripts_per_user=int(os.getenv("SCRIPT_HISTORY_MAX_PER_USER", DEFAULT_MAX_SCRIPTS_PER_USER)),
+                max_age_days=int(os.getenv("SCRIPT_HISTORY_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS))
+            )
+        return _store
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from script_engine import add_seed_script, build_prompt, error_result, estimate_generation_tokens, result_from_info, stream_script
+from scheduler import BACKGROUND, get_scheduler
+from history_store import get_history_store
+
+# Finished jobs are forgotten after this long
+JOB_RETENTION_SECONDS = 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+# One background generation; status moves queued -> running -> done / failed / cancelled.
+# While it runs, text and received_tokens follow the stream so a page can render it as it arrives.
+# Jobs with save_to_history=False (e.g. speculative ones) only warm the response cache;
+# uncapped jobs (capped=False) don't count against the user's concurrency cap (see scheduler).
+class Job:
+    def __init__(self, user_id, content_type, title, tone, duration, target_audience, use_cache, save_to_history=True, priority=BACKGROUND, seed_script=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.user_id = user_id
+        self.content_type = content_type
+        self.title = title
+        self.tone = tone
+        self.duration = duration
+        self.target_audience = target_audience
+        self.use_cache = use_cache
+        self.save_to_history = save_to_history
+        self.priority = priority
+        self.seed_script = seed_script
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.text = ""
+        self.received_tokens = 0
+        self.max_output_tokens = None
+        self.result = None
+        self.history_id = None
+        self.ticket = None
+        self.future = None
+        self.cancel_requested = False
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+
+# Process-wide worker pool running generations outside Streamlit script runs,
+# so results land in history even if the session reruns or navigates away.
+# Jobs wait in the scheduler's line (fair across users, no deadline), not on a worker: a job is only
+# handed to a worker once its ticket is granted, so max_workers should cover every slot the scheduler
+# can grant (the default is its max_concurrent).
+class JobQueue:
+    def __init__(self, max_workers):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="script-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id, content_type, title, tone="casual", duration="medium", target_audience="general", use_cache=True, save_to_history=True, capped=True, priority=BACKGROUND, seed_script=None):
+        job = Job(user_id, content_type, title, tone, duration, target_audience, use_cache, save_to_history, priority, seed_script)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        prompt = build_prompt(content_type, title, tone, duration, target_audience)
+        if seed_script:
+            prompt = add_seed_script(prompt, seed_script["title"], seed_script["script"])
+        job.ticket = get_scheduler().enqueue(
+            user_id, priority, estimate_generation_tokens(prompt, content_type, duration), on_grant=lambda ticket: self._start(job, ticket), capped=capped
+        )
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    # Cancel a job: queued jobs never start; running ones finish upstream but are discarded
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_requested = True
+        if get_scheduler().cancel(job.ticket):
+            self._finish(job, CANCELLED)
+        elif job.future.cancel():
+            get_scheduler().release(job.ticket)
+            self._finish(job, CANCELLED)
+        return True
+
+    # Place in the scheduler's line of a job still waiting to start (0 once it runs)
+    def queue_position(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.status != QUEUED:
+            return 0
+        return get_scheduler().position(job.ticket) or 1
+
+    # Called by the scheduler (under its lock) once the job's ticket is granted
+    def _start(self, job, ticket):
+        job.future = self._pool.submit(self._run, job, ticket)
+
+    def _run(self, job, ticket):
+        try:
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+            info = {}
+            try:
+                for job.text, job.received_tokens in stream_script(
+                    job.content_type, job.title, job.tone, job.duration, job.target_audience,
+                    use_cache=job.use_cache, info=info, enqueued_at=job.created_at, seed_script=job.seed_script,
+                    user_id=job.user_id, priority=job.priority, ticket=ticket
+                ):
+                    job.max_output_tokens = info["max_output_tokens"]
+                result = result_from_info(job.text, info)
+            except Exception as e:
+                result = error_result(e, info.get("attempts", 0))
+        finally:
+            get_scheduler().release(ticket)
+        job.result = result
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+        elif result.ok:
+            if job.save_to_history:
+                job.history_id = get_history_store().save(job.user_id, job.content_type, job.title, result.text)
+            self._finish(job, DONE)
+        else:
+            self._finish(job, FAILED)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+# Function to get the process-wide job queue (module state survives Streamlit reruns)
+def get_job_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(max_workers=int(os.getenv("SCRIPT_JOB_WORKERS", 0)) or get_scheduler().max_concurrent)
+        return _queue
@@ -0,0 +1,151 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from budgets import MAX_OUTPUT_TOKENS, MIN_OUTPUT_TOKENS, TOKENS_PER_WORD, get_budget
+
+# Durations (in minutes) from which a script is written outline-first, section by section
+LONG_FORM_MIN_MINUTES = {
+    "youtube": 10,
+    "podcast": 60,
+}
+# Roughly one section per this many minutes of content
+MINUTES_PER_SECTION = {
+    "youtube": 2.5,
+    "podcast": 10,
+}
+MIN_SECTIONS = 4
+MAX_SECTIONS = 8
+MAX_SECTION_WORKERS = 6
+OUTLINE_MAX_OUTPUT_TOKENS = 512
+
+# Used when the outline response can't be parsed
+FALLBACK_OUTLINES = {
+    "youtube": ["Intro", "Background", "Key point one", "Key point two", "Key point three", "Conclusion and call to action"],
+    "podcast": ["Opening segment", "Guest background", "Main discussion", "Deep dive", "Lightning round", "Closing segment"],
+}
+
+PENDING_SECTION = "_✍️ Writing this section..._"
+
+
+# Function to check whether a request should use the outline-then-sections engine
+def is_long_form(content_type, duration):
+    min_minutes = LONG_FORM_MIN_MINUTES.get(content_type)
+    return min_minutes is not None and get_budget(content_type, duration).minutes >= min_minutes
+
+
+def _section_count(content_type, minutes):
+    return max(MIN_SECTIONS, min(MAX_SECTIONS, round(minutes / MINUTES_PER_SECTION[content_type])))
+
+
+# Function to build the prompt asking for a numbered outline
+def build_outline_prompt(content_type, title, tone, duration, target_audience, section_count):
+    kind = "YouTube video script" if content_type == "youtube" else "podcast Q&A episode plan"
+    return f"""
+        Create an outline for a {kind} about: "{title}"
+        Tone: {tone}
+        Duration: {duration}
+        Target Audience: {target_audience}
+
+        Return exactly {section_count} sections, one per line, in this format:
+        1. Section heading | one sentence describing what the section covers
+
+        The first section opens the {"video" if content_type == "youtube" else "episode"} and the last one wraps it up.
+        Return only the numbered list.
+        """
+
+
+# Function to parse "1. Heading | summary" lines into [{"heading", "summary"}]
+def parse_outline(text):
+    sections = []
+    for line in text.splitlines():
+        match = re.match(r"^\s*(?:[-*]\s*)?\**\d+[.)]\**\s*(.+)$", line)
+        if not match:
+            continue
+        heading, _, summary = match.group(1).partition("|")
+        heading = heading.strip().strip("*#: ").strip()
+        if heading:
+            sections.append({"heading": heading, "summary": summary.strip()})
+    return sections
+
+
+# Function to build the prompt for one section, carrying the whole outline for consistent transitions
+def build_section_prompt(content_type, title, tone, target_audience, outline, index, words):
+    section = outline[index]
+    outline_text = "\n".join(
+        f"        {i + 1}. {item['heading']}{' - ' + item['summary'] if item['summary'] else ''}"
+        for i, item in enumerate(outline)
+    )
+    if index == 0:
+        position = "This is the opening section: start with an attention-grabbing hook."
+    elif index == len(outline) - 1:
+        position = "This is the final section: wrap up and end with a call to action."
+    else:
+        position = f'Open by picking up from "{outline[index - 1]["heading"]}".'
+    if index < len(outline) - 1:
+        position += f' End with a one-sentence transition into "{outline[index + 1]["heading"]}".'
+
+    if content_type == "youtube":
+        task = f'Write section {index + 1} of {len(outline)} of a YouTube video script about "{title}".'
+        extras = "Include B-roll suggestions, talking points, and transitions in [brackets]."
+    else:
+        task = f'Write segment {index + 1} of {len(outline)} of a podcast Q&A plan titled "{title}".'
+        extras = "Include thought-provoking questions, 2-3 follow-ups for each, and talking points for the host."
+
+    return f"""
+        {task}
+        Tone: {tone}
+        Target Audience: {target_audience}
+
+        Full outline:
+{outline_text}
+
+        Write only this section: "{section['heading']}"{' - ' + section['summary'] if section['summary'] else ''}
+        Length: about {words} words. Do not repeat the section heading.
+        {position}
+        {extras}
+        """
+
+
+# Function to join the sections in outline order; pending sections get a placeholder
+def stitch(outline, texts):
+    parts = []
+    for section, text in zip(outline, texts):
+        parts.append(f"## {section['heading']}\n\n{(text or PENDING_SECTION).strip()}")
+    return "\n\n".join(parts)
+
+
+# Generator yielding (stitched_text_so_far, tokens) for a long-form script.
+# complete(prompt, max_output_tokens) must return the model's text for one prompt.
+def stream_long_form(content_type, title, tone, duration, target_audience, complete):
+    budget = get_budget(content_type, duration)
+
+    # 1. Outline
+    section_count = _section_count(content_type, budget.minutes)
+    outline_text = complete(
+        build_outline_prompt(content_type, title, tone, duration, target_audience, section_count),
+        OUTLINE_MAX_OUTPUT_TOKENS
+    )
+    outline = parse_outline(outline_text)[:MAX_SECTIONS]
+    if len(outline) < 2:
+        outline = [{"heading": heading, "summary": ""} for heading in FALLBACK_OUTLINES[content_type]]
+
+    # 2. Expand every section concurrently; latency follows the slowest section
+    words = max(60, budget.target_words // len(outline))
+    section_tokens = max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, int(budget.max_output_tokens / len(outline) * 1.25)))
+    texts = [None] * len(outline)
+    stitched = stitch(outline, texts)
+    yield stitched, 0
+
+    with ThreadPoolExecutor(max_workers=min(len(outline), MAX_SECTION_WORKERS)) as pool:
+        futures = {
+            pool.submit(
+                complete,
+                build_section_prompt(content_type, title, tone, target_audience, outline, i, words),
+                section_tokens
+            ): i
+            for i in range(len(outline))
+        }
+        # 3. Stitch in outline order as each section arrives
+        for future in as_completed(futures):
+            texts[futures[future]] = future.result()
+            stitched = stitch(outline, texts)
+            yield stitched, int(len(" ".join(t for t in texts if t).split()) * TOKENS_PER_WORD)
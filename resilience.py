@@ -0,0 +1,240 @@
+import os
+import random
+import threading
+import time
+from google.api_core import exceptions as api_exceptions
+from sqlite_store import connect
+
+# Upstream errors worth retrying: quota bursts and transient server-side failures
+RATE_LIMIT_ERRORS = (api_exceptions.ResourceExhausted, api_exceptions.TooManyRequests)
+TRANSIENT_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.GatewayTimeout,
+    api_exceptions.Aborted,
+)
+RETRYABLE_ERRORS = RATE_LIMIT_ERRORS + TRANSIENT_ERRORS
+
+# Default limits (override through the environment / .env)
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_BURST = 10
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT_SECONDS = 30
+
+
+# Raised when the local rate limiter can't hand out a token in time
+class RateLimitedError(Exception):
+    pass
+
+
+# Raised without calling upstream while the circuit breaker is open
+class CircuitOpenError(Exception):
+    pass
+
+
+# Token bucket shared by every caller in the process
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    # Take one token, waiting up to timeout seconds; returns False if none became available
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate_per_second
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+# Token bucket shared by every process on the host through a SQLite (WAL) file, so workers behind a
+# load balancer spend one quota between them. Each take is one short write transaction; wall
+# clock time is used because monotonic clocks aren't comparable across processes.
+class SharedTokenBucket:
+    def __init__(self, path, rate_per_second, capacity, name="gemini"):
+        self.path = path
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.name = name
+        with connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (name, float(capacity), time.time())
+            )
+
+    # Take a token if one is free; returns 0, or the seconds until the next token
+    def _try_take(self):
+        with connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, updated_at = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate_per_second)
+            wait = 0 if tokens >= 1 else (1 - tokens) / self.rate_per_second
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                (tokens - 1 if not wait else tokens, now, self.name)
+            )
+        return wait
+
+    # Take one token, waiting up to timeout seconds; returns False if none became available
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._try_take()
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+# Circuit breaker: opens after consecutive upstream failures, lets one probe through after a cool-down
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._probe_thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    # Return True if a call may go upstream right now
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout and not self._probing:
+                self._probing = True
+                self._probe_thread = threading.get_ident()
+                return True
+            return False
+
+    # Give back this thread's probe when its call never reached upstream (e.g. no rate-limit token),
+    # so the next caller can probe instead of the breaker staying half-open
+    def release_probe(self):
+        with self._lock:
+            if self._probing and self._probe_thread == threading.get_ident():
+                self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+# Function to compute a full-jitter exponential backoff delay for a retry attempt (1-based)
+def backoff_delay(attempt, base_delay=1.0, max_delay=20.0):
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+# Function to call fn() through the rate limiter and circuit breaker, retrying retryable
+# errors with jittered backoff. Returns (result, attempts); raises the last error on failure.
+def call_with_retry(fn, limiter=None, breaker=None, max_attempts=None, acquire_timeout=30):
+    limiter = limiter or get_rate_limiter()
+    breaker = breaker or get_circuit_breaker()
+    max_attempts = max_attempts or int(os.getenv("GEMINI_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+
+    attempt = 0
+    while True:
+        attempt += 1
+        if not breaker.allow():
+            raise CircuitOpenError("The model service is unavailable right now; please try again shortly.")
+        if not limiter.acquire(timeout=acquire_timeout):
+            breaker.release_probe()
+            raise RateLimitedError("Too many requests right now; please try again in a moment.")
+        try:
+            result = fn()
+        except RETRYABLE_ERRORS:
+            breaker.record_failure()
+            if attempt >= max_attempts:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        except Exception:
+            # The service answered (e.g. a rejected prompt), so it is healthy
+            breaker.record_success()
+            raise
+        breaker.record_success()
+        return result, attempt
+
+
+_rate_limiter = None
+_circuit_breaker = None
+_lock = threading.Lock()
+
+
+# Function to get the rate limiter, sized to the API quota and shared by every process using the
+# same GEMINI_RATE_LIMIT_PATH; GEMINI_RATE_LIMIT_PATH="" keeps a bucket per process instead
+def get_rate_limiter():
+    global _rate_limiter
+    with _lock:
+        if _rate_limiter is None:
+            requests_per_minute = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE))
+            capacity = int(os.getenv("GEMINI_BURST", DEFAULT_BURST))
+            path = os.getenv("GEMINI_RATE_LIMIT_PATH", "script_rate_limit.db")
+            if path:
+                _rate_limiter = SharedTokenBucket(path, rate_per_second=requests_per_minute / 60, capacity=capacity)
+            else:
+                _rate_limiter = TokenBucket(rate_per_second=requests_per_minute / 60, capacity=capacity)
+        return _rate_limiter
+
+
+# Function to get the process-wide circuit breaker for the model service
+def get_circuit_breaker():
+    global _circuit_breaker
+    with _lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv("GEMINI_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)),
+                reset_timeout=float(os.getenv("GEMINI_RESET_TIMEOUT_SECONDS", DEFAULT_RESET_TIMEOUT_SECONDS))
+            )
+        return _circuit_breaker
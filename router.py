@@ -0,0 +1,96 @@
+import os
+import queue
+import threading
+from itertools import chain
+from backends import FAST, PRIMARY
+
+# Routes: which model serves a content type. PRIMARY and FAST use only that backend role;
+# HEDGED starts on the primary and adds the fast model if the primary is slow to start.
+HEDGED = "hedged"
+ROUTES = (PRIMARY, FAST, HEDGED)
+
+# Short reels don't benefit from the larger model; longer scripts do, but shouldn't stall on it
+DEFAULT_ROUTES = {
+    "instagram": FAST,
+    "youtube": HEDGED,
+    "podcast": HEDGED,
+}
+DEFAULT_HEDGE_DEADLINE_SECONDS = 4.0
+
+
+# Per-content-type routing policy and the first-token deadline that triggers a hedged request
+class RoutingPolicy:
+    def __init__(self, routes=None, hedge_deadline=DEFAULT_HEDGE_DEADLINE_SECONDS):
+        self.routes = dict(DEFAULT_ROUTES, **(routes or {}))
+        self.hedge_deadline = hedge_deadline
+
+    def route_for(self, content_type):
+        return self.routes.get(content_type, PRIMARY)
+
+
+# Function to parse "instagram=fast,youtube=hedged" into a routes dict, ignoring unknown routes
+def parse_routes(text):
+    routes = {}
+    for item in (text or "").split(","):
+        content_type, _, route = item.partition("=")
+        if route.strip().lower() in ROUTES:
+            routes[content_type.strip().lower()] = route.strip().lower()
+    return routes
+
+
+# Function to race streaming calls for their first chunk. openers[0] starts at once; each later
+# opener starts when no started call has produced a chunk within deadline seconds, or as soon as
+# every started call has failed. Returns (index, chunks) for the first call to produce a chunk,
+# where chunks yields that first chunk followed by the rest. Slower calls are dropped unread.
+def first_to_respond(openers, deadline):
+    results = queue.Queue()
+    decided = threading.Event()
+
+    def run(index):
+        try:
+            chunks = iter(openers[index]())
+            first = next(chunks, None)
+        except Exception as e:
+            results.put((index, None, e))
+            return
+        if not decided.is_set():
+            results.put((index, chain([first] if first is not None else [], chunks), None))
+
+    started = 0
+    pending = 0
+    error = None
+    while True:
+        if started < len(openers) and (started == 0 or pending == 0):
+            threading.Thread(target=run, args=(started,), daemon=True).start()
+            started += 1
+            pending += 1
+        try:
+            index, chunks, error = results.get(timeout=deadline if started < len(openers) else None)
+        except queue.Empty:
+            # Nothing yet: hedge with the next opener while the slow call keeps going
+            threading.Thread(target=run, args=(started,), daemon=True).start()
+            started += 1
+            pending += 1
+            continue
+        pending -= 1
+        if error is None:
+            decided.set()
+            return index, chunks
+        if pending == 0 and started == len(openers):
+            raise error
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+# Function to get the process-wide routing policy (SCRIPT_ROUTES overrides the defaults)
+def get_routing_policy():
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = RoutingPolicy(
+                routes=parse_routes(os.getenv("SCRIPT_ROUTES")),
+                hedge_deadline=float(os.getenv("SCRIPT_HEDGE_DEADLINE_SECONDS", DEFAULT_HEDGE_DEADLINE_SECONDS))
+            )
+        return _policy
@@ -0,0 +1,324 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from resilience import RateLimitedError
+
+# Priority classes, served strictly in this order: a queued interactive request always goes
+# before background jobs (including speculation), and those before batch runs
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BATCH = "batch"
+PRIORITY_CLASSES = (INTERACTIVE, BACKGROUND, BATCH)
+
+# Default limits (override through the environment / .env). The global cap leaves room for a full
+# batch run (16 workers) next to interactive traffic; the rate limiter guards the API quota itself.
+DEFAULT_MAX_CONCURRENT = 32
+DEFAULT_USER_CONCURRENCY = 2
+DEFAULT_USER_TOKENS_PER_MINUTE = 60_000
+DEFAULT_MAX_WAIT_SECONDS = 120
+QUOTA_WINDOW_SECONDS = 60
+# Callers that don't name a user (in-process code) are queued fairly as one flow, without per-user limits
+ANONYMOUS_USER = "anonymous"
+# Shared users stand for many callers (unnamed API clients, batch runs): they get their own concurrency
+# cap, sized like their worker pools, and no token quota, since the rate limiter already bounds them
+DEFAULT_SHARED_USERS = {"api": 8, "batch": 16}
+
+
+# Function to pick the more urgent of two priority classes (None counts as the least urgent)
+def higher_priority(a, b):
+    if a is None or b is None:
+        return a or b
+    return a if PRIORITY_CLASSES.index(a) <= PRIORITY_CLASSES.index(b) else b
+
+
+# Function to parse "alice=2,bob=0.5" into a per-user weight dict
+def parse_weights(text):
+    weights = {}
+    for item in (text or "").split(","):
+        user_id, _, weight = item.partition("=")
+        try:
+            weights[user_id.strip()] = float(weight)
+        except ValueError:
+            continue
+    return weights
+
+
+# One generation waiting for (or holding) a slot; tokens is its estimated prompt + output budget.
+# Tickets sharing a group are parts of one request (e.g. every format of one title), which counts
+# once against its user's concurrency cap; uncapped tickets (speculative work the user didn't ask
+# for yet) don't count against it at all. on_grant(ticket), if set, is called (under the
+# scheduler's lock, so it must be quick) as soon as the ticket is granted.
+class Ticket:
+    def __init__(self, user_id, priority, tokens, group=None, limited=True, on_grant=None, capped=True):
+        self.user_id = user_id
+        self.priority = priority
+        self.tokens = tokens
+        self.group = group
+        self.limited = limited
+        self.on_grant = on_grant
+        self.capped = capped
+        self.created_at = time.time()
+        self.granted = False
+
+
+# Central admission control in front of the model: at most max_concurrent generations run at once.
+# Waiting requests are queued per priority class and per user; within a class, users are served in
+# weighted fair order (start-time fair queueing on estimated tokens), so one user's bulk work
+# can't starve others. A user runs at most user_concurrency requests at a time and spends at most
+# user_tokens_per_minute estimated tokens per rolling minute; shared_users maps shared users to their own cap.
+class Scheduler:
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, user_concurrency=DEFAULT_USER_CONCURRENCY,
+                 user_tokens_per_minute=DEFAULT_USER_TOKENS_PER_MINUTE, weights=None, max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS,
+                 shared_users=None):
+        self.max_concurrent = max_concurrent
+        self.user_concurrency = user_concurrency
+        self.user_tokens_per_minute = user_tokens_per_minute
+        self.weights = weights or {}
+        self.max_wait_seconds = max_wait_seconds
+        self.shared_users = shared_users or {}
+        self._queues = {priority: {} for priority in PRIORITY_CLASSES}  # priority -> user -> deque of tickets
+        self._running = {}  # user -> running generations
+        self._requests = {}  # user -> running requests (a group of tickets counts once)
+        self._groups = {}  # (user, group) -> running tickets of that group
+        self._spent = {}  # user -> deque of (timestamp, tokens) in the quota window
+        self._finish_tags = {}  # user -> virtual finish time of their last granted request
+        self._virtual_time = 0.0
+        self._cond = threading.Condition()
+
+    # Put a ticket in line (it may be granted straight away); wait() for it or pass on_grant, then
+    # release() it. A queued ticket has no deadline until someone wait()s for it.
+    def enqueue(self, user_id=None, priority=INTERACTIVE, tokens=0, group=None, on_grant=None, capped=True):
+        ticket = Ticket(
+            user_id or ANONYMOUS_USER, priority if priority in PRIORITY_CLASSES else INTERACTIVE, tokens,
+            group=group, limited=user_id is not None, on_grant=on_grant, capped=capped
+        )
+        with self._cond:
+            self._queues[ticket.priority].setdefault(ticket.user_id, deque()).append(ticket)
+            self._dispatch()
+        return ticket
+
+    # Move a waiting ticket up to a more urgent class, e.g. when an interactive request joins a
+    # background generation it is waiting on
+    def promote(self, ticket, priority):
+        with self._cond:
+            if ticket.granted or higher_priority(priority, ticket.priority) == ticket.priority:
+                return
+            queue = self._queues[ticket.priority].get(ticket.user_id)
+            if queue is None or ticket not in queue:
+                return
+            self._remove(ticket)
+            ticket.priority = priority
+            # Keep the user's queue in arrival order, so a promoted ticket keeps its place
+            queue = self._queues[priority].setdefault(ticket.user_id, deque())
+            queue.insert(sum(1 for other in queue if other.created_at <= ticket.created_at), ticket)
+            self._dispatch()
+            self._cond.notify_all()
+
+    # Wait for a slot; on_wait(position) is called whenever the 1-based queue position changes.
+    # Raises RateLimitedError if no slot is granted within max_wait_seconds.
+    def acquire(self, user_id=None, priority=INTERACTIVE, tokens=0, on_wait=None, group=None):
+        return self.wait(self.enqueue(user_id, priority, tokens, group), on_wait)
+
+    def wait(self, ticket, on_wait=None):
+        deadline = time.monotonic() + self.max_wait_seconds
+        reported = None
+        with self._cond:
+            while not ticket.granted:
+                position = self._position(ticket)
+                if on_wait is not None and position != reported:
+                    reported = position
+                    on_wait(position)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    raise RateLimitedError("Too many requests in line right now; please try again in a moment.")
+                # Wake up at least every second: quota windows free up with time, not with releases
+                self._cond.wait(timeout=min(remaining, 1.0))
+                self._dispatch()
+        return ticket
+
+    # Take a ticket out of line; returns False if it was already granted (release() it instead)
+    def cancel(self, ticket):
+        with self._cond:
+            if ticket.granted:
+                return False
+            self._remove(ticket)
+            self._dispatch()
+            return True
+
+    # 1-based place in line of a waiting ticket (0 once granted)
+    def position(self, ticket):
+        with self._cond:
+            return 0 if ticket.granted else self._position(ticket)
+
+    def release(self, ticket):
+        with self._cond:
+            if ticket.capped and self._leave_group(ticket):
+                self._requests[ticket.user_id] -= 1
+                if not self._requests[ticket.user_id]:
+                    del self._requests[ticket.user_id]
+            self._running[ticket.user_id] -= 1
+            if not self._running[ticket.user_id]:
+                del self._running[ticket.user_id]
+                # An idle user's finish tag behind the virtual clock no longer affects their order
+                if self._finish_tags.get(ticket.user_id, 0.0) <= self._virtual_time:
+                    self._finish_tags.pop(ticket.user_id, None)
+            self._dispatch()
+
+    # Returns True when the ticket was the last running one of its request
+    def _leave_group(self, ticket):
+        if ticket.group is None:
+            return True
+        key = (ticket.user_id, ticket.group)
+        self._groups[key] -= 1
+        if self._groups[key]:
+            return False
+        del self._groups[key]
+        return True
+
+    @contextmanager
+    def slot(self, user_id=None, priority=INTERACTIVE, tokens=0, on_wait=None, group=None):
+        ticket = self.acquire(user_id, priority, tokens, on_wait, group)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def _spent_tokens(self, user_id, now):
+        spent = self._spent.get(user_id)
+        if not spent:
+            return 0
+        while spent and spent[0][0] < now - QUOTA_WINDOW_SECONDS:
+            spent.popleft()
+        if not spent:
+            del self._spent[user_id]
+            return 0
+        return sum(tokens for _, tokens in spent)
+
+    # A ticket may start if its user is under their concurrency cap (other parts of a request that is
+    # already running don't count again) and token quota (a request bigger than the whole quota still
+    # runs once the window is empty). Anonymous tickets have no per-user limits.
+    def _eligible(self, ticket, now):
+        if not ticket.limited:
+            return True
+        joining = ticket.group is not None and (ticket.user_id, ticket.group) in self._groups
+        cap = self.shared_users.get(ticket.user_id, self.user_concurrency)
+        if ticket.capped and not joining and self._requests.get(ticket.user_id, 0) >= cap:
+            return False
+        if ticket.user_id in self.shared_users:
+            return True
+        spent = self._spent_tokens(ticket.user_id, now)
+        return spent == 0 or spent + ticket.tokens <= self.user_tokens_per_minute
+
+    def _start_tag(self, user_id):
+        return max(self._virtual_time, self._finish_tags.get(user_id, 0.0))
+
+    # Service order of a user's queue within a class: virtual start time, then arrival of its head
+    def _order(self, priority, user_id):
+        return self._start_tag(user_id), self._queues[priority][user_id][0].created_at
+
+    # Grant slots while capacity is free: highest class first, then the eligible user with the
+    # smallest virtual start time (earliest arrival on ties), head of their queue
+    def _dispatch(self):
+        now = time.time()
+        granted = False
+        while sum(self._running.values()) < self.max_concurrent:
+            ticket = None
+            for priority in PRIORITY_CLASSES:
+                users = [
+                    user_id for user_id, queue in self._queues[priority].items()
+                    if self._eligible(queue[0], now)
+                ]
+                if users:
+                    user_id = min(users, key=lambda user_id: self._order(priority, user_id))
+                    ticket = self._queues[priority][user_id][0]
+                    break
+            if ticket is None:
+                break
+            self._remove(ticket)
+            start = self._start_tag(ticket.user_id)
+            self._virtual_time = start
+            self._finish_tags[ticket.user_id] = start + max(ticket.tokens, 1) / self.weights.get(ticket.user_id, 1.0)
+            self._running[ticket.user_id] = self._running.get(ticket.user_id, 0) + 1
+            key = (ticket.user_id, ticket.group)
+            if ticket.capped and (ticket.group is None or key not in self._groups):
+                self._requests[ticket.user_id] = self._requests.get(ticket.user_id, 0) + 1
+            if ticket.capped and ticket.group is not None:
+                self._groups[key] = self._groups.get(key, 0) + 1
+            self._spent.setdefault(ticket.user_id, deque()).append((now, ticket.tokens))
+            ticket.granted = True
+            granted = True
+            if ticket.on_grant is not None:
+                ticket.on_grant(ticket)
+        if granted:
+            self._cond.notify_all()
+
+    def _remove(self, ticket):
+        queue = self._queues[ticket.priority].get(ticket.user_id)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.priority][ticket.user_id]
+
+    # Estimated place in line: everything queued in higher classes, earlier tickets of the same
+    # user, and the head ticket of every user in the same class who would be served first
+    def _position(self, ticket):
+        ahead = 0
+        for priority in PRIORITY_CLASSES:
+            if priority == ticket.priority:
+                break
+            ahead += sum(len(queue) for queue in self._queues[priority].values())
+        queues = self._queues[ticket.priority]
+        own = queues.get(ticket.user_id, ())
+        ahead += list(own).index(ticket) if ticket in own else 0
+        my_order = (self._start_tag(ticket.user_id), ticket.created_at)
+        ahead += sum(1 for user_id in queues if user_id != ticket.user_id and self._order(ticket.priority, user_id) < my_order)
+        return ahead + 1
+
+    # Running and queued generations per class, for the admin panel and the Prometheus export
+    def stats(self):
+        with self._cond:
+            return {
+                "running": sum(self._running.values()),
+                "queued": {priority: sum(len(queue) for queue in users.values()) for priority, users in self._queues.items()},
+                "users_running": len(self._running),
+            }
+
+    # Prometheus text exposition of the current queue depths
+    def prometheus(self):
+        stats = self.stats()
+        lines = [
+            "# HELP scriptcraft_scheduler_running Generations holding a scheduler slot.",
+            "# TYPE scriptcraft_scheduler_running gauge",
+            f"scriptcraft_scheduler_running {stats['running']}",
+            "# HELP scriptcraft_scheduler_queued Generations waiting for a scheduler slot.",
+            "# TYPE scriptcraft_scheduler_queued gauge",
+        ]
+        for priority, queued in stats["queued"].items():
+            lines.append(f'scriptcraft_scheduler_queued{{priority="{priority}"}} {queued}')
+        return "\n".join(lines) + "\n"
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+# Function to get the process-wide scheduler
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(
+                max_concurrent=int(os.getenv("SCRIPT_SCHEDULER_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT)),
+                user_concurrency=int(os.getenv("SCRIPT_USER_MAX_CONCURRENT", DEFAULT_USER_CONCURRENCY)),
+                user_tokens_per_minute=int(os.getenv("SCRIPT_USER_TOKENS_PER_MINUTE", DEFAULT_USER_TOKENS_PER_MINUTE)),
+                weights=parse_weights(os.getenv("SCRIPT_USER_WEIGHTS")),
+                shared_users={
+                    **DEFAULT_SHARED_USERS,
+                    **{user_id: int(limit) for user_id, limit in parse_weights(os.getenv("SCRIPT_SHARED_USERS")).items()}
+                },
+                max_wait_seconds=float(os.getenv("SCRIPT_SCHEDULER_MAX_WAIT_SECONDS", DEFAULT_MAX_WAIT_SECONDS))
+            )
+        return _scheduler
@@ -0,0 +1,117 @@
+import os
+import hashlib
+import threading
+import time
+from sqlite_store import connect
+
+# Default cache settings (override through the environment / .env)
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+# Function to normalize a prompt parameter so trivially different inputs share a key
+def normalize_param(value):
+    return " ".join(str(value).lower().split())
+
+
+# Function to build the cache key for a set of generation parameters
+def make_cache_key(content_type, title, tone, duration, target_audience):
+    parts = [normalize_param(v) for v in (content_type, title, tone, duration, target_audience)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+# On-disk response cache shared across sessions, worker processes and restarts, with TTL and LRU eviction
+class ScriptCache:
+    def __init__(self, path, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    script TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+
+    def _bump(self, conn, name):
+        conn.execute("UPDATE stats SET value = value + 1 WHERE name = ?", (name,))
+
+    # Return the cached script for a key, or None on a miss / expired entry. The read and the
+    # LRU/counter update share one write transaction: a read transaction upgraded after another
+    # process wrote would fail with "database is locked" instead of waiting.
+    def get(self, key):
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT script, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self._bump(conn, "hits")
+                return row[0]
+            if row is not None:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._bump(conn, "misses")
+            return None
+
+    # Check for a live entry without touching its LRU position or the hit/miss counters
+    def contains(self, key):
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl_seconds
+
+    # Store a script, then drop expired entries and the least recently used ones over the cap
+    def set(self, key, script):
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, script, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, script, now, now)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def stats(self):
+        with connect(self.path) as conn:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "entries": entries,
+            "hit_rate": counters.get("hits", 0) / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock, connect(self.path) as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("UPDATE stats SET value = 0")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide cache (module state survives Streamlit reruns)
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ScriptCache(
+                path=os.getenv("SCRIPT_CACHE_PATH", "script_cache.db"),
+                ttl_seconds=int(os.getenv("SCRIPT_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                max_entries=int(os.getenv("SCRIPT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+            )
+        return _cache
@@ -0,0 +1,569 @@
+import hashlib
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from google.api_core.exceptions import InvalidArgument
+from script_cache import get_cache, make_cache_key, normalize_param
+from single_flight import SingleFlight
+from budgets import get_budget, get_usage_stats
+from longform import is_long_form, stream_long_form
+from sections import build_section_prompt, parse_sections, section_max_output_tokens, splice_section
+import gemini_client
+from backends import get_backend
+from router import FAST, HEDGED, PRIMARY, first_to_respond, get_routing_policy
+from telemetry import CallTimer, estimate_tokens, get_telemetry
+from scheduler import INTERACTIVE, get_scheduler, higher_priority
+from resilience import (
+    RATE_LIMIT_ERRORS, RETRYABLE_ERRORS, CircuitOpenError, RateLimitedError,
+    call_with_retry, get_circuit_breaker
+)
+
+# Supported formats and their duration options
+CONTENT_TYPES = ["instagram", "youtube", "podcast"]
+DURATION_OPTIONS = {
+    "instagram": ["15 seconds", "30 seconds", "60 seconds"],
+    "youtube": ["3-5 minutes", "5-10 minutes", "10-15 minutes", "15+ minutes"],
+    "podcast": ["20-30 minutes", "30-45 minutes", "45-60 minutes", "60+ minutes"]
+}
+# How many alternative versions generate_variants may produce at once
+VARIANT_OPTIONS = [2, 3, 4]
+
+
+# Outcome of a generation: either text or a typed error, never an error message posing as a script
+@dataclass
+class ScriptResult:
+    text: str = None
+    error: str = None
+    error_kind: str = None  # rate_limited, unavailable, blocked, invalid_request or unknown
+    attempts: int = 0
+    cached: bool = False
+    route: str = None  # which route answered (see router); None for cached results, "similar" for near-duplicates
+    similar_title: str = None  # title of the near-duplicate that was reused
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# Raised when the model answers without any text, e.g. when every chunk was blocked or empty;
+# such an answer is a failure, never a script to cache or save
+class EmptyResponseError(Exception):
+    pass
+
+
+# Function to map an exception to a failed ScriptResult
+def error_result(error, attempts=0):
+    # google.generativeai is imported lazily (see gemini_client); if it isn't loaded, none of its errors were raised
+    genai_types = sys.modules.get("google.generativeai.types")
+    blocked_errors = (genai_types.BlockedPromptException, genai_types.StopCandidateException) if genai_types else ()
+    if isinstance(error, (RateLimitedError,) + RATE_LIMIT_ERRORS):
+        kind = "rate_limited"
+    elif isinstance(error, (CircuitOpenError,) + RETRYABLE_ERRORS):
+        kind = "unavailable"
+    elif isinstance(error, blocked_errors + (EmptyResponseError,)):
+        kind = "blocked"
+    elif isinstance(error, ValueError):
+        kind = "invalid_request"
+    else:
+        kind = "unknown"
+    return ScriptResult(error=str(error), error_kind=kind, attempts=attempts)
+
+# Function to extract text from a streamed chunk (chunks without parts, e.g. the final one, carry no text)
+def chunk_text(chunk):
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+# Function to reject a model answer that carries no text
+def require_text(text):
+    if not text.strip():
+        raise EmptyResponseError("The model returned no text (the response was blocked or empty).")
+    return text
+
+# Function to check whether the model stopped because it ran out of output tokens
+def hit_token_limit(response_or_chunk):
+    try:
+        reason = response_or_chunk.candidates[0].finish_reason
+    except (AttributeError, IndexError):
+        return False
+    return getattr(reason, "name", str(reason)) == "MAX_TOKENS"
+
+# Function to count tokens received so far, preferring the usage reported by the API
+def received_tokens(chunk, text_so_far):
+    usage = getattr(chunk, "usage_metadata", None)
+    if usage is not None and getattr(usage, "candidates_token_count", 0):
+        return usage.candidates_token_count
+    # Fall back to the common ~4 characters per token estimate
+    return len(text_so_far) // 4
+
+# Function to estimate what a fresh generation costs against the scheduler's token quota:
+# the prompt plus the whole output budget
+def estimate_generation_tokens(prompt, content_type, duration):
+    return estimate_tokens(prompt) + get_budget(content_type, duration).max_output_tokens
+
+# Function to build the model prompt for a content type
+def build_prompt(content_type, title, tone="casual", duration="medium", target_audience="general"):
+    # Length instructions come from the same budget that sets max_output_tokens
+    budget = get_budget(content_type, duration)
+    # Create a more detailed prompt based on all parameters
+    if content_type == "instagram":
+        prompt = f"""
+        Generate an engaging Instagram reel/story script about: "{title}"
+        Tone: {tone}
+        Duration: {duration} (about {budget.target_words} words of speaking time)
+        Target Audience: {target_audience}
+        
+        Format the script with clear sections for:
+        - Hook (attention-grabbing opening)
+        - Main content (2-3 key points)
+        - Call to action
+        
+        Include suggestions for visual elements/transitions in [brackets].
+        """
+    elif content_type == "youtube":
+        prompt = f"""
+        Generate a structured YouTube video script for: "{title}"
+        Tone: {tone}
+        Duration: {duration} (about {budget.target_words} words of narration)
+        Target Audience: {target_audience}
+        
+        Format with:
+        - Attention-grabbing intro (30 seconds)
+        - Main content with clear sections/timestamps
+        - Conclusion and call to action
+        
+        Include B-roll suggestions, talking points, and transitions in [brackets].
+        """
+    elif content_type == "podcast":
+        prompt = f"""
+        Generate a set of insightful Q&A prompts for a podcast titled: "{title}"
+        Tone: {tone}
+        Episode length: {duration} (keep the plan to about {budget.target_words} words)
+        Target Audience: {target_audience}
+        
+        Include:
+        - 5-8 thought-provoking questions
+        - 2-3 follow-up questions for each main question
+        - Suggested talking points for the host
+        - Opening and closing segments
+        
+        Questions should encourage in-depth, interesting responses.
+        """
+    else:
+        raise ValueError(f"Unknown content type: {content_type}")
+    return prompt
+
+# Function to get the text of every candidate in a multi-candidate response
+def candidate_texts(response):
+    return ["".join(part.text for part in candidate.content.parts) for candidate in response.candidates]
+
+# Function to append a script for a similar title to a prompt, so the model adapts it instead of starting over
+def add_seed_script(prompt, seed_title, seed_script):
+    return prompt + f"""
+        A script for the similar title "{seed_title}" is below. Use it as a starting point:
+        keep what works, and rewrite whatever doesn't fit the new title.
+        
+        {seed_script}
+        """
+
+# Function to build the near-duplicate scope: titles only match within the same other parameters
+def similarity_scope(content_type, tone, duration, target_audience):
+    return "\x1f".join(normalize_param(v) for v in (content_type, tone, duration, target_audience))
+
+# Function to find a cached script whose title is a near-duplicate of this one (same content type,
+# tone, duration and audience). Returns {"title", "similarity", "script"} or None; an exact cache
+# entry for the title itself always wins, so that case returns None.
+def find_similar_script(content_type, title, tone="casual", duration="medium", target_audience="general"):
+    cache = get_cache()
+    cache_key = make_cache_key(content_type, title, tone, duration, target_audience)
+    if cache.contains(cache_key):
+        return None
+    # The title index needs numpy, so it is imported on first use rather than on the app's startup path
+    from title_index import get_title_index
+    index = get_title_index()
+    match = index.lookup(similarity_scope(content_type, tone, duration, target_audience), title, exclude_key=cache_key)
+    if match is None:
+        return None
+    script = cache.get(match.cache_key)
+    if script is None:
+        # The script expired or was evicted from the cache; stop offering it
+        index.remove(match.cache_key)
+        return None
+    return {"title": match.title, "similarity": match.similarity, "script": script}
+
+# Concurrent identical generations (across all sessions) share one upstream call
+_single_flight = SingleFlight()
+# Guards each flight's scheduling priority and ticket, so a joiner's promotion is never missed
+_promotion_lock = threading.Lock()
+
+# Generator yielding (text_so_far, tokens_received) while a script is produced.
+# Long YouTube/podcast durations are written outline-first, section by section (see longform).
+# Cached scripts are yielded in one step; fresh results are stored in the cache.
+# Identical requests already in flight are joined; use_cache=False forces a fresh call.
+# reuse_similar=True also serves a cached near-duplicate title (see find_similar_script), and
+# seed_script={"title", "script"} asks the model to adapt that script rather than start from scratch.
+# If an info dict is passed it is filled with "cached", "coalesced", "attempts",
+# "max_output_tokens", "similar" (the reused match, if any) and (for fresh results) "route" and "output_tokens".
+# Fresh generations wait for a scheduler slot under user_id and priority (see scheduler); while
+# waiting, updates carry no text and info["queue_position"] holds the place in line. Calls sharing a
+# group are parts of one request and count once against the user's concurrency cap. Joining a
+# flight that is still waiting moves it up to this call's priority. A caller that already holds a
+# granted scheduler ticket (the job queue) passes it as ticket; the generation runs under it and the
+# caller releases it.
+# Every call is recorded in telemetry; enqueued_at (epoch seconds) counts time spent waiting
+# before this call, e.g. in the job queue, as queue time.
+def stream_script(content_type, title, tone="casual", duration="medium", target_audience="general", stream=True, use_cache=True, info=None, enqueued_at=None, reuse_similar=False, seed_script=None, user_id=None, priority=INTERACTIVE, group=None, ticket=None):
+    info = {} if info is None else info
+    timer = CallTimer("script", content_type, duration, enqueued_at)
+    budget = get_budget(content_type, duration)
+    info.update(cached=False, coalesced=False, attempts=0, max_output_tokens=budget.max_output_tokens, similar=None, queue_position=None)
+    flight = None
+    outcome = "abandoned"
+    try:
+        prompt = build_prompt(content_type, title, tone, duration, target_audience)
+        if seed_script:
+            prompt = add_seed_script(prompt, seed_script["title"], seed_script["script"])
+        
+        # Serve repeated requests from the shared response cache ("Regenerate" bypasses the lookup)
+        cache = get_cache()
+        cache_key = make_cache_key(content_type, title, tone, duration, target_audience)
+        if use_cache:
+            cached_script = cache.get(cache_key)
+            if cached_script is not None:
+                info["cached"] = True
+                timer.first_output()
+                outcome = "ok"
+                yield cached_script, len(cached_script) // 4
+                return
+            similar = find_similar_script(content_type, title, tone, duration, target_audience) if reuse_similar else None
+            if similar is not None:
+                info.update(cached=True, similar=similar)
+                timer.first_output()
+                outcome = "ok"
+                yield similar["script"], len(similar["script"]) // 4
+                return
+        
+        # A seeded prompt differs from the plain one, so it must never join (or be joined by) an unseeded flight
+        flight_key = cache_key
+        if seed_script:
+            flight_key += ":seed:" + hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        flight, started = _single_flight.start(
+            flight_key,
+            lambda flight: _generate_fresh(prompt, cache_key, content_type, title, tone, duration, target_audience, stream, flight, user_id, priority, group, ticket),
+            force=not use_cache
+        )
+        info["coalesced"] = not started
+        if not started:
+            _promote(flight, priority)
+        try:
+            for update in flight.follow():
+                info["queue_position"] = flight.queue_position
+                if flight.queue_position is None:
+                    timer.first_output()
+                yield update
+            outcome = "ok"
+        finally:
+            info["attempts"] = flight.attempts
+            info["route"] = flight.route
+            if flight.output_tokens is not None:
+                info["output_tokens"] = flight.output_tokens
+    except Exception as e:
+        outcome = error_result(e).error_kind
+        raise
+    finally:
+        spent = flight is not None and not info["coalesced"]
+        get_telemetry().record(timer.finish(
+            model=flight.model if flight and flight.model else get_backend().model_name,
+            route=flight.route if flight and flight.route else ("similar" if info["similar"] else "cache"),
+            outcome=outcome,
+            cache_hit=info["cached"],
+            coalesced=info["coalesced"],
+            attempts=info["attempts"],
+            first_attempt_at=flight.first_attempt_at if flight else None,
+            prompt_tokens=flight.prompt_tokens if spent else 0,
+            output_tokens=(flight.output_tokens or 0) if spent else 0
+        ))
+
+# Function to start a model call with the backend for a role and a prebuilt config, going through the
+# shared rate limiter / circuit breaker and retrying transient errors before any output
+def _open_response(prompt, max_output_tokens, stream=False, on_attempt=None, role=PRIMARY, acquire_timeout=30, candidate_count=1):
+    model = get_backend(role)
+    
+    def call():
+        if on_attempt:
+            on_attempt()
+        return model.generate_content(
+            prompt,
+            generation_config=gemini_client.get_generation_config(max_output_tokens, candidate_count),
+            stream=stream
+        )
+    
+    response, _ = call_with_retry(call, acquire_timeout=acquire_timeout)
+    return response
+
+# Function to open a streaming call along a route (see router): the primary or fast model, or the
+# primary with a hedged call to the fast model if no first chunk arrives within the deadline.
+# The hedge only uses spare rate-limit capacity: if no token is free it is skipped, not queued.
+# Returns (chunks, served_route, model_name); served_route is "hedged:primary" / "hedged:fast" for hedged calls.
+def _open_routed_stream(prompt, max_output_tokens, route, on_attempt=None):
+    if route != HEDGED:
+        return iter(_open_response(prompt, max_output_tokens, True, on_attempt, role=route)), route, get_backend(route).model_name
+    roles = [PRIMARY, FAST]
+    winner, chunks = first_to_respond(
+        [
+            lambda: _open_response(prompt, max_output_tokens, True, on_attempt, role=PRIMARY),
+            lambda: _open_response(prompt, max_output_tokens, True, on_attempt, role=FAST, acquire_timeout=0),
+        ],
+        get_routing_policy().hedge_deadline
+    )
+    return chunks, f"{HEDGED}:{roles[winner]}", get_backend(roles[winner]).model_name
+
+# Function to get a complete (non-streamed) answer along a route; hedged routes stream so the
+# first-token deadline applies. Returns (text, served_route, model_name).
+def _complete_routed(prompt, max_output_tokens, route, on_attempt=None):
+    if route != HEDGED:
+        return chunk_text(_open_response(prompt, max_output_tokens, on_attempt=on_attempt, role=route)), route, get_backend(route).model_name
+    chunks, served_route, model_name = _open_routed_stream(prompt, max_output_tokens, route, on_attempt)
+    return "".join(chunk_text(chunk) for chunk in chunks), served_route, model_name
+
+# Function to raise a flight's scheduling priority to a joiner's, moving its ticket up if it is still waiting
+def _promote(flight, priority):
+    with _promotion_lock:
+        flight.priority = higher_priority(flight.priority, priority)
+        ticket, priority = flight.ticket, flight.priority
+    if ticket is not None:
+        get_scheduler().promote(ticket, priority)
+
+# Producer for one fresh generation, run on the single-flight thread. The whole generation (every
+# upstream call of a long-form script included) holds one scheduler slot, charged the prompt plus
+# the output budget; joiners of the flight share it.
+def _generate_fresh(prompt, cache_key, content_type, title, tone, duration, target_audience, stream, flight, user_id=None, priority=INTERACTIVE, group=None, ticket=None):
+    if ticket is not None:
+        flight.ticket = ticket
+        yield from _produce_script(prompt, content_type, title, tone, duration, target_audience, stream, flight)
+        return
+    scheduler = get_scheduler()
+    tokens = estimate_generation_tokens(prompt, content_type, duration)
+    with _promotion_lock:
+        # Joiners may already have raised the flight's priority before this thread got here
+        flight.priority = higher_priority(flight.priority, priority)
+        flight.ticket = scheduler.enqueue(user_id, flight.priority, tokens, group)
+    ticket = scheduler.wait(flight.ticket, on_wait=flight.set_queue_position)
+    try:
+        flight.set_queue_position(None)
+        yield from _produce_script(prompt, content_type, title, tone, duration, target_audience, stream, flight)
+    finally:
+        scheduler.release(ticket)
+
+def _produce_script(prompt, content_type, title, tone, duration, target_audience, stream, flight):
+    budget = get_budget(content_type, duration)
+    route = get_routing_policy().route_for(content_type)
+    
+    def complete(prompt, max_output_tokens):
+        flight.add_prompt_tokens(estimate_tokens(prompt))
+        text, served_route, model_name = _complete_routed(prompt, max_output_tokens, route, flight.count_attempt)
+        flight.note_route(served_route, model_name)
+        return text
+    
+    generated_text = ""
+    output_tokens = 0
+    truncated = False
+    if is_long_form(content_type, duration):
+        # Outline first, then every section in parallel, stitched back in order as they finish
+        for generated_text, output_tokens in stream_long_form(
+            content_type, title, tone, duration, target_audience, complete
+        ):
+            yield generated_text, output_tokens
+    elif stream or route == HEDGED:
+        # Hedged routes always stream upstream so the first-token deadline applies
+        flight.add_prompt_tokens(estimate_tokens(prompt))
+        chunks, served_route, model_name = _open_routed_stream(prompt, budget.max_output_tokens, route, flight.count_attempt)
+        flight.note_route(served_route, model_name)
+        try:
+            for chunk in chunks:
+                generated_text += chunk_text(chunk)
+                output_tokens = received_tokens(chunk, generated_text)
+                truncated = hit_token_limit(chunk)
+                yield generated_text, output_tokens
+        except RETRYABLE_ERRORS:
+            # Can't retry transparently once text has been shown; count it against the upstream
+            get_circuit_breaker().record_failure()
+            raise
+    else:
+        flight.add_prompt_tokens(estimate_tokens(prompt))
+        response = _open_response(prompt, budget.max_output_tokens, on_attempt=flight.count_attempt, role=route)
+        flight.note_route(route, get_backend(route).model_name)
+        generated_text = chunk_text(response)
+        output_tokens = received_tokens(response, generated_text)
+        truncated = hit_token_limit(response)
+        yield generated_text, output_tokens
+    
+    require_text(generated_text)
+    
+    # Report actual usage against the budget so the budget table can be tuned
+    flight.output_tokens = output_tokens
+    get_usage_stats().record(content_type, duration, budget.max_output_tokens, output_tokens, truncated)
+    
+    # Store the fresh result so later identical and near-duplicate requests skip the model call
+    remember_script(content_type, title, tone, duration, target_audience, generated_text)
+
+# Function to store a script in the response cache and index its title so near-duplicate
+# requests can be offered it
+def remember_script(content_type, title, tone, duration, target_audience, script):
+    cache_key = make_cache_key(content_type, title, tone, duration, target_audience)
+    get_cache().set(cache_key, script)
+    from title_index import get_title_index
+    get_title_index().add(cache_key, similarity_scope(content_type, tone, duration, target_audience), title)
+
+# Headless script generation returning a ScriptResult (no Streamlit calls, safe to run from worker threads)
+def generate_text(content_type, title, tone="casual", duration="medium", target_audience="general", use_cache=True, enqueued_at=None, reuse_similar=False, user_id=None, priority=INTERACTIVE, group=None, ticket=None):
+    info = {}
+    try:
+        generated_text = ""
+        for generated_text, _ in stream_script(content_type, title, tone, duration, target_audience, stream=False, use_cache=use_cache, info=info, enqueued_at=enqueued_at, reuse_similar=reuse_similar, user_id=user_id, priority=priority, group=group, ticket=ticket):
+            pass
+    except Exception as e:
+        return error_result(e, info.get("attempts", 0))
+    return result_from_info(generated_text, info)
+
+# Function to build the ScriptResult for a finished stream_script call from its info dict
+def result_from_info(text, info):
+    similar = info.get("similar")
+    return ScriptResult(
+        text=text,
+        attempts=info["attempts"],
+        cached=info["cached"],
+        route="similar" if similar else info.get("route"),
+        similar_title=similar["title"] if similar else None
+    )
+
+# Generator yielding (content_type, ScriptResult) for every format of one title,
+# in the order the concurrent requests finish. durations maps content type -> duration.
+# The formats are one request to the scheduler, so they don't wait on each other's slots.
+def generate_all_formats(title, tone="casual", durations=None, target_audience="general", use_cache=True, user_id=None, priority=INTERACTIVE):
+    durations = durations or {}
+    group = uuid.uuid4().hex
+    with ThreadPoolExecutor(max_workers=len(CONTENT_TYPES)) as pool:
+        futures = {
+            pool.submit(
+                generate_text,
+                content_type,
+                title,
+                tone,
+                durations.get(content_type, DURATION_OPTIONS[content_type][1]),
+                target_audience,
+                use_cache,
+                user_id=user_id,
+                priority=priority,
+                group=group
+            ): content_type
+            for content_type in CONTENT_TYPES
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+# Generate count alternative scripts for one request, side by side. Short scripts ask for every
+# candidate in one upstream call (candidate_count); whatever that call doesn't return, e.g. when the
+# model rejects several candidates, and long-form scripts (already several calls each) are made as
+# concurrent single calls. Variants skip the cache; store the one the user picks with remember_script.
+# All variants share one scheduler slot, charged count times the single-script estimate.
+# Returns a list of ScriptResult, failed variants included.
+def generate_variants(content_type, title, tone="casual", duration="medium", target_audience="general", count=VARIANT_OPTIONS[1], user_id=None, priority=INTERACTIVE):
+    timer = CallTimer("variants", content_type, duration)
+    budget = get_budget(content_type, duration)
+    # Hedging races single streams, so variants use the route's own model
+    role = FAST if get_routing_policy().route_for(content_type) == FAST else PRIMARY
+    attempts = []
+    prompt_tokens = []
+    
+    def complete(prompt, max_output_tokens, candidate_count=1):
+        prompt_tokens.append(estimate_tokens(prompt))
+        response = _open_response(
+            prompt, max_output_tokens, on_attempt=lambda: attempts.append(time.time()),
+            role=role, candidate_count=candidate_count
+        )
+        timer.first_output()
+        return candidate_texts(response) if candidate_count > 1 else [response.text]
+    
+    def one_variant():
+        if not is_long_form(content_type, duration):
+            return complete(prompt, budget.max_output_tokens)[0]
+        text = ""
+        for text, _ in stream_long_form(content_type, title, tone, duration, target_audience, lambda p, m: complete(p, m)[0]):
+            pass
+        return text
+    
+    results = []
+    try:
+        prompt = build_prompt(content_type, title, tone, duration, target_audience)
+        tokens = count * (estimate_tokens(prompt) + budget.max_output_tokens)
+        with get_scheduler().slot(user_id, priority, tokens):
+            if count > 1 and not is_long_form(content_type, duration):
+                try:
+                    texts = complete(prompt, budget.max_output_tokens, count)
+                    results = [ScriptResult(text=text, attempts=len(attempts), route=role) for text in texts[:count] if text]
+                except InvalidArgument:
+                    # This model only returns one candidate per call
+                    pass
+            missing = count - len(results)
+            if missing:
+                with ThreadPoolExecutor(max_workers=missing) as pool:
+                    futures = [pool.submit(one_variant) for _ in range(missing)]
+                for future in futures:
+                    try:
+                        results.append(ScriptResult(text=future.result(), attempts=len(attempts), route=role))
+                    except Exception as e:
+                        results.append(error_result(e, len(attempts)))
+    except Exception as e:
+        results.append(error_result(e, len(attempts)))
+    succeeded = [result for result in results if result.ok]
+    get_telemetry().record(timer.finish(
+        model=get_backend(role).model_name,
+        route=role,
+        outcome="ok" if succeeded else results[0].error_kind,
+        attempts=len(attempts),
+        first_attempt_at=attempts[0] if attempts else None,
+        prompt_tokens=sum(prompt_tokens),
+        output_tokens=sum(estimate_tokens(result.text) for result in succeeded)
+    ))
+    return results
+
+# Rewrite one section of a script (see sections.parse_sections) and splice it back in.
+# Returns a ScriptResult holding the whole updated script.
+def regenerate_section(content_type, title, tone, target_audience, script, index, instruction="", user_id=None, priority=INTERACTIVE):
+    timer = CallTimer("section", content_type, "section")
+    route = get_routing_policy().route_for(content_type)
+    model_name = get_backend(FAST if route == FAST else PRIMARY).model_name
+    attempts = []
+    prompt = ""
+    try:
+        sections = parse_sections(script)
+        prompt = build_section_prompt(content_type, title, tone, target_audience, sections, index, instruction)
+        max_output_tokens = section_max_output_tokens(sections[index])
+        with get_scheduler().slot(user_id, priority, estimate_tokens(prompt) + max_output_tokens):
+            text, route, model_name = _complete_routed(
+                prompt,
+                max_output_tokens,
+                route,
+                on_attempt=lambda: attempts.append(time.time())
+            )
+        timer.first_output()
+        result = ScriptResult(text=splice_section(sections, index, require_text(text)), attempts=len(attempts), route=route)
+        output_tokens = estimate_tokens(text)
+    except Exception as e:
+        result = error_result(e, len(attempts))
+        output_tokens = 0
+    get_telemetry().record(timer.finish(
+        model=model_name,
+        route=route,
+        outcome="ok" if result.ok else result.error_kind,
+        attempts=len(attempts),
+        first_attempt_at=attempts[0] if attempts else None,
+        prompt_tokens=estimate_tokens(prompt) if attempts else 0,
+        output_tokens=output_tokens
+    ))
+    return result
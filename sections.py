@@ -0,0 +1,120 @@
+import re
+from budgets import MIN_OUTPUT_TOKENS, TOKENS_PER_WORD
+
+# Lines that start a new section: markdown headings, bold-only lines ("**Hook**"),
+# bold labels ("**Call to action:** ...") and podcast question blocks ("Question 3", "Q3:")
+SECTION_START_PATTERNS = [
+    re.compile(r"^\s{0,3}#{1,6}\s+\S"),
+    re.compile(r"^\s*\*\*[^*\n]{2,80}\*\*:?\s*$"),
+    re.compile(r"^\s*\*\*[^*\n]{2,80}:\*\*"),
+    re.compile(r"^\s*(?:\*\*)?\s*(?:question|q)\s*\d+\b", re.IGNORECASE),
+]
+
+
+# Labels that share their line with the section's text ("**Hook:** Did you know...", "Q3: Why...")
+INLINE_LABEL_PATTERNS = [
+    re.compile(r"^\s*\*\*[^*\n]{2,80}:\*\*"),
+    re.compile(r"^\s*(?:\*\*)?\s*(?:question|q)\s*\d+\b[:.)]?(?:\*\*)?:?", re.IGNORECASE),
+]
+
+
+def _is_section_start(line):
+    return any(pattern.match(line) for pattern in SECTION_START_PATTERNS)
+
+
+# Function to get a section's heading: its whole first line, or only the label when the section's
+# text carries on after it on the same line ("" for the text before the first heading)
+def section_heading(section):
+    lines = section.strip().splitlines()
+    if not lines or not _is_section_start(lines[0]):
+        return ""
+    for pattern in INLINE_LABEL_PATTERNS:
+        match = pattern.match(lines[0])
+        if match:
+            return match.group(0).strip()
+    return lines[0].strip()
+
+
+# Function to check whether a section starts with a heading (the text before the first heading doesn't)
+def has_heading(section):
+    return bool(section_heading(section))
+
+
+# Function to turn a section's heading (or first line, if it has none) into a short label
+def section_label(text):
+    first_line = section_heading(text) or (text.strip().splitlines()[0] if text.strip() else "")
+    label = re.sub(r"[#*_`]", "", first_line).strip().rstrip(":").strip()
+    return label if len(label) <= 60 else label[:57] + "..."
+
+
+# Function to split a script into sections; "".join(sections) == script.
+# Text before the first recognised heading becomes its own section.
+def parse_sections(script):
+    sections = []
+    current = []
+    for line in script.splitlines(keepends=True):
+        if _is_section_start(line) and "".join(current).strip():
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+# Function to build a small prompt that rewrites one section, with its neighbours as context
+def build_section_prompt(content_type, title, tone, target_audience, sections, index, instruction=""):
+    outline = "\n".join(f"        - {section_label(section)}" for section in sections)
+    previous_section = sections[index - 1].strip() if index > 0 else "(this is the start of the script)"
+    next_section = sections[index + 1].strip() if index < len(sections) - 1 else "(this is the end of the script)"
+    change_request = f"Requested change: {instruction.strip()}" if instruction.strip() else "Make it fresher and more engaging."
+    heading = section_heading(sections[index])
+    if heading:
+        keep_heading = f"Start it with its heading {heading} exactly as it is, keep a similar length and format,"
+    else:
+        keep_heading = "It is the introduction before the first heading: don't add a heading. Keep a similar length and format,"
+    return f"""
+        You are editing one section of a {content_type} script titled "{title}".
+        Tone: {tone}
+        Target Audience: {target_audience}
+
+        Script outline:
+{outline}
+
+        Section before:
+        {previous_section}
+
+        Section to rewrite:
+        {sections[index].strip()}
+
+        Section after:
+        {next_section}
+
+        Rewrite only the "Section to rewrite". {change_request}
+        {keep_heading}
+        and make it flow naturally from the section before into the section after.
+        Return only the rewritten section.
+        """
+
+
+# Function to size the output budget for rewriting a section
+def section_max_output_tokens(section):
+    return max(MIN_OUTPUT_TOKENS, int(len(section.split()) * TOKENS_PER_WORD * 1.5))
+
+
+# Function to put a rewritten section back in place, keeping the original heading and spacing.
+# Only the heading itself is kept: for inline labels the rewritten text follows it on the same line.
+def splice_section(sections, index, new_text):
+    original = sections[index]
+    body = new_text.strip()
+    heading = section_heading(original)
+    if heading:
+        # The model may have dropped or changed the heading; put the original one back
+        text = body[len(section_heading(body)):].strip()
+        inline = heading != original.strip().splitlines()[0].strip()
+        body = f"{heading} {text}" if inline else f"{heading}\n{text}"
+    leading = original[:len(original) - len(original.lstrip())]
+    trailing = original[len(original.rstrip()):] or "\n"
+    updated = list(sections)
+    updated[index] = f"{leading}{body}{trailing}"
+    return "".join(updated)
@@ -0,0 +1,188 @@
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from script_engine import CONTENT_TYPES, generate_all_formats, generate_text
+from script_cache import get_cache
+from resilience import get_circuit_breaker
+from telemetry import get_telemetry
+from scheduler import get_scheduler
+from history_store import get_history_store
+from exporter import EXPORT_FORMATS, write_export
+import gemini_client
+from backends import get_backend
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+MAX_BODY_BYTES = 64 * 1024
+# Scheduler user for requests that don't name a trusted user (see user_id below)
+DEFAULT_API_USER = "api"
+
+# HTTP status for each ScriptResult error kind
+ERROR_STATUS = {
+    "invalid_request": 400,
+    "blocked": 422,
+    "rate_limited": 429,
+    "unavailable": 503,
+    "unknown": 500,
+}
+
+
+# Function to turn a ScriptResult into the JSON response body
+def result_payload(result):
+    if result.ok:
+        payload = {"script": result.text, "cached": result.cached, "attempts": result.attempts, "route": result.route}
+        if result.similar_title:
+            payload["similar_title"] = result.similar_title
+        return payload
+    return {"error": result.error, "error_kind": result.error_kind, "attempts": result.attempts}
+
+
+# JSON API over the same engine, cache and rate limiter as the Streamlit app:
+#   POST /generate      {"content_type", "title", "tone"?, "duration"?, "target_audience"?, "use_cache"?, "reuse_similar"?}
+#   POST /generate/all  {"title", "tone"?, "durations"?, "target_audience"?, "use_cache"?}
+#   GET  /health
+#   GET  /metrics       Prometheus text export of generation telemetry and scheduler queues
+# Generations are scheduled fairly per user (see scheduler). The X-User-Id header is trusted only from
+# callers holding SCRIPT_API_TOKEN (e.g. a frontend naming its own users); everyone else is the "api" user.
+#   GET  /export?user_id=...&format=jsonl|csv|markdown|zip   a user's whole history, streamed. User ids
+#        aren't secret (they are in app URLs), so this needs SCRIPT_API_TOKEN set and presented.
+class ScriptRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ScriptCraft/1.0"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        token = os.getenv("SCRIPT_API_TOKEN")
+        return not token or self.headers.get("Authorization") == f"Bearer {token}"
+
+    # Whether the caller presented the configured token (False when no token is configured)
+    def _authenticated(self):
+        return bool(os.getenv("SCRIPT_API_TOKEN")) and self._authorized()
+
+    # Scheduler user for this request: anyone could send a fresh X-User-Id (and so a fresh quota) per
+    # request, so the header only counts when a token is configured and the caller presented it
+    def _user_id(self):
+        if self._authenticated():
+            return self.headers.get("X-User-Id") or DEFAULT_API_USER
+        return DEFAULT_API_USER
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        data = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        return data
+
+    def _send_text(self, status, text, content_type="text/plain; charset=utf-8"):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Stream a history export without a Content-Length; the body ends when the connection closes
+    def _send_export(self, query):
+        user_id = query.get("user_id", [""])[0]
+        fmt = query.get("format", ["jsonl"])[0]
+        if not user_id or fmt not in EXPORT_FORMATS:
+            self._send_json(400, {"error": f"user_id and a format in {list(EXPORT_FORMATS)} are required", "error_kind": "invalid_request"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", EXPORT_FORMATS[fmt]["mime"])
+        self.send_header("Content-Disposition", f'attachment; filename="scriptcraft-scripts.{EXPORT_FORMATS[fmt]["extension"]}"')
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        write_export(get_history_store().iter_batches(user_id), fmt, self.wfile)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/export":
+            if not self._authenticated():
+                self._send_json(403, {"error": "Exports require SCRIPT_API_TOKEN to be set and presented"})
+                return
+            self._send_export(parse_qs(url.query))
+            return
+        if self.path == "/metrics":
+            self._send_text(200, get_telemetry().prometheus() + get_scheduler().prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+            return
+        if self.path != "/health":
+            self._send_json(404, {"error": "Not found"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "circuit": get_circuit_breaker().state,
+            "cache": get_cache().stats(),
+            "scheduler": get_scheduler().stats(),
+        })
+
+    def do_POST(self):
+        if not self._authorized():
+            self._send_json(401, {"error": "Unauthorized"})
+            return
+        try:
+            data = self._read_json()
+            if not str(data.get("title", "")).strip():
+                raise ValueError("title is required")
+        except ValueError as e:
+            self._send_json(400, {"error": str(e), "error_kind": "invalid_request"})
+            return
+
+        options = {
+            "tone": data.get("tone", "casual"),
+            "target_audience": data.get("target_audience", "general"),
+            "use_cache": bool(data.get("use_cache", True)),
+            "user_id": self._user_id(),
+        }
+        if self.path == "/generate":
+            if data.get("content_type") not in CONTENT_TYPES:
+                self._send_json(400, {"error": f"content_type must be one of {CONTENT_TYPES}", "error_kind": "invalid_request"})
+                return
+            result = generate_text(
+                data["content_type"], data["title"], duration=data.get("duration", "medium"),
+                reuse_similar=bool(data.get("reuse_similar", False)), **options
+            )
+            self._send_json(200 if result.ok else ERROR_STATUS[result.error_kind], result_payload(result))
+        elif self.path == "/generate/all":
+            durations = data.get("durations") or {}
+            if not isinstance(durations, dict) or not all(
+                content_type in CONTENT_TYPES and isinstance(duration, str) for content_type, duration in durations.items()
+            ):
+                self._send_json(400, {"error": f"durations must map content types in {CONTENT_TYPES} to durations", "error_kind": "invalid_request"})
+                return
+            scripts = {
+                content_type: result_payload(result)
+                for content_type, result in generate_all_formats(data["title"], durations=durations, **options)
+            }
+            self._send_json(200, {"scripts": scripts})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def log_message(self, format, *args):
+        if os.getenv("SCRIPT_API_ACCESS_LOG"):
+            super().log_message(format, *args)
+
+
+# Function to run the HTTP service until interrupted (one thread per request)
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    gemini_client.load_environment()
+    get_backend().warm_up()
+    httpd = ThreadingHTTPServer((host, port), ScriptRequestHandler)
+    httpd.daemon_threads = True
+    print(f"Serving script generation on http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+import uuid
+import weakref
+import zlib
+from collections import OrderedDict
+from sqlite_store import connect
+
+# Default session memory settings (override through the environment / .env)
+DEFAULT_BUDGET_BYTES = 64 * 1024
+DEFAULT_SPILL_MAX_AGE_SECONDS = 24 * 3600
+COMPRESSION_LEVEL = 6
+
+
+# On-disk home for scripts pushed out of session memory, keyed by session and name.
+# Rows older than max_age_seconds are dropped, so abandoned sessions don't pile up.
+class SpillStore:
+    def __init__(self, path, max_age_seconds=DEFAULT_SPILL_MAX_AGE_SECONDS):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        with connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS spilled (
+                    session_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, name)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_spilled_updated ON spilled(updated_at)")
+
+    def put(self, session_id, name, data):
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO spilled (session_id, name, data, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, name, data, now)
+            )
+            conn.execute("DELETE FROM spilled WHERE updated_at < ?", (now - self.max_age_seconds,))
+
+    def get(self, session_id, name):
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT data FROM spilled WHERE session_id = ? AND name = ?", (session_id, name)).fetchone()
+        return row[0] if row else None
+
+    # Delete one spilled script, or all of a session's when name is None
+    def delete(self, session_id, name=None):
+        with connect(self.path) as conn:
+            if name is None:
+                conn.execute("DELETE FROM spilled WHERE session_id = ?", (session_id,))
+            else:
+                conn.execute("DELETE FROM spilled WHERE session_id = ? AND name = ?", (session_id, name))
+
+
+# Scripts held by one Streamlit session, zlib-compressed, within a byte budget. When the budget is
+# exceeded the oldest scripts move to the spill store (or are dropped without one); the newest
+# always stays in memory. get() reads spilled scripts back from disk transparently.
+class SessionScripts:
+    def __init__(self, session_id, budget_bytes=DEFAULT_BUDGET_BYTES, spill=None):
+        self.session_id = session_id
+        self.budget_bytes = budget_bytes
+        self.spill = spill
+        self._entries = OrderedDict()  # name -> (compressed bytes, raw byte count)
+        self._spilled = set()
+        self._lock = threading.Lock()
+
+    # Store a script under a name (None removes it); replacing a script makes it the newest
+    def put(self, name, text):
+        if text is None:
+            self.pop(name)
+            return
+        raw = text.encode("utf-8")
+        data = zlib.compress(raw, COMPRESSION_LEVEL)
+        with self._lock:
+            self._entries.pop(name, None)
+            self._entries[name] = (data, len(raw))
+            was_spilled = name in self._spilled
+            self._spilled.discard(name)
+            evicted = self._evict()
+        if was_spilled:
+            self.spill.delete(self.session_id, name)
+        for evicted_name, evicted_data in evicted:
+            self.spill.put(self.session_id, evicted_name, evicted_data)
+
+    def _evict(self):
+        evicted = []
+        while len(self._entries) > 1 and sum(len(data) for data, _ in self._entries.values()) > self.budget_bytes:
+            name, (data, _) = self._entries.popitem(last=False)
+            if self.spill is not None:
+                self._spilled.add(name)
+                evicted.append((name, data))
+        return evicted
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            spilled = name in self._spilled
+        if entry is not None:
+            return zlib.decompress(entry[0]).decode("utf-8")
+        if spilled:
+            data = self.spill.get(self.session_id, name)
+            return zlib.decompress(data).decode("utf-8") if data is not None else None
+        return None
+
+    def pop(self, name):
+        with self._lock:
+            self._entries.pop(name, None)
+            spilled = name in self._spilled
+            self._spilled.discard(name)
+        if spilled:
+            self.spill.delete(self.session_id, name)
+
+    # Memory held by this session's scripts: compressed and original bytes, plus spilled script count
+    def usage(self):
+        with self._lock:
+            return {
+                "bytes": sum(len(data) for data, _ in self._entries.values()),
+                "raw_bytes": sum(raw for _, raw in self._entries.values()),
+                "scripts": len(self._entries),
+                "spilled": len(self._spilled),
+            }
+
+
+_spill_store = None
+_sessions = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+# Function to get the process-wide spill store; SCRIPT_SESSION_SPILL_PATH="" drops evicted scripts instead
+def get_spill_store():
+    global _spill_store
+    with _lock:
+        path = os.getenv("SCRIPT_SESSION_SPILL_PATH", "script_sessions.db")
+        if _spill_store is None and path:
+            _spill_store = SpillStore(
+                path=path,
+                max_age_seconds=int(os.getenv("SCRIPT_SESSION_SPILL_MAX_AGE_SECONDS", DEFAULT_SPILL_MAX_AGE_SECONDS))
+            )
+        return _spill_store
+
+
+# Function to create the script store for a new session; it is counted in session_memory() while
+# the session lives, and its spilled scripts are deleted once it is garbage collected
+def new_session_scripts():
+    spill = get_spill_store()
+    scripts = SessionScripts(
+        session_id=uuid.uuid4().hex,
+        budget_bytes=int(os.getenv("SCRIPT_SESSION_BUDGET_BYTES", DEFAULT_BUDGET_BYTES)),
+        spill=spill
+    )
+    if spill is not None:
+        weakref.finalize(scripts, spill.delete, scripts.session_id)
+    with _lock:
+        _sessions.add(scripts)
+    return scripts
+
+
+# Function to total session script memory across every live session in this process
+def session_memory():
+    with _lock:
+        sessions = list(_sessions)
+    totals = {"sessions": len(sessions), "bytes": 0, "raw_bytes": 0, "scripts": 0, "spilled": 0}
+    for scripts in sessions:
+        for name, value in scripts.usage().items():
+            totals[name] += value
+    return totals
+
+
+# Function to render the session memory gauges in the Prometheus text format
+def session_memory_prometheus():
+    memory = session_memory()
+    lines = []
+    for name, key, help_text in [
+        ("scriptcraft_sessions", "sessions", "Live sessions holding scripts."),
+        ("scriptcraft_session_script_bytes", "bytes", "Compressed script bytes held in session memory."),
+        ("scriptcraft_session_script_raw_bytes", "raw_bytes", "Uncompressed size of the scripts held in session memory."),
+        ("scriptcraft_session_spilled_scripts", "spilled", "Session scripts spilled to disk."),
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {memory[key]}"]
+    return "\n".join(lines) + "\n"
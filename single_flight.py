@@ -0,0 +1,113 @@
+import threading
+import time
+
+
+# One in-flight generation; the producer publishes progress, any number of callers follow it
+class Flight:
+    def __init__(self):
+        self.attempts = 0
+        self.first_attempt_at = None
+        self.prompt_tokens = 0
+        self.output_tokens = None
+        self.route = None
+        self.model = None
+        self.queue_position = None  # place in the scheduler's line while waiting, else None
+        self.priority = None  # scheduling priority, raised to the most urgent joiner's (see script_engine)
+        self.ticket = None  # the producer's scheduler ticket
+        self._cond = threading.Condition()
+        self._text = ""
+        self._tokens = 0
+        self._version = 0
+        self._done = False
+        self._error = None
+
+    def count_attempt(self):
+        with self._cond:
+            self.attempts += 1
+            if self.first_attempt_at is None:
+                self.first_attempt_at = time.time()
+
+    def add_prompt_tokens(self, tokens):
+        with self._cond:
+            self.prompt_tokens += tokens
+
+    # Remember which route and model answered; "mixed" if calls for this flight went different ways
+    def note_route(self, route, model):
+        with self._cond:
+            self.route = route if self.route in (None, route) else "mixed"
+            self.model = model if self.model in (None, model) else "mixed"
+
+    # Report the place in line to followers (an update with no new text); None once a slot is granted
+    def set_queue_position(self, position):
+        with self._cond:
+            self.queue_position = position
+            if position is not None:
+                self._version += 1
+                self._cond.notify_all()
+
+    def publish(self, text, tokens):
+        with self._cond:
+            self._text = text
+            self._tokens = tokens
+            self._version += 1
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._cond.notify_all()
+
+    # Generator yielding (text_so_far, tokens) updates; raises the producer's error if it failed
+    def follow(self):
+        seen = 0
+        while True:
+            with self._cond:
+                while self._version == seen and not self._done:
+                    self._cond.wait()
+                text, tokens, version = self._text, self._tokens, self._version
+                done, error = self._done, self._error
+            if version != seen:
+                seen = version
+                yield text, tokens
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+# Registry deduplicating concurrent identical work: callers with the same key share one Flight.
+# The producer runs on its own thread, so it completes even if the caller that started it goes away.
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    # Start produce(flight) for key, or join the flight already running for it.
+    # force=True always starts a fresh producer. Returns (flight, started_new).
+    def start(self, key, produce, force=False):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and not force:
+                return flight, False
+            flight = Flight()
+            if key not in self._flights:
+                self._flights[key] = flight
+        threading.Thread(target=self._run, args=(key, flight, produce), daemon=True).start()
+        return flight, True
+
+    def _run(self, key, flight, produce):
+        try:
+            for text, tokens in produce(flight):
+                flight.publish(text, tokens)
+            flight.finish()
+        except Exception as e:
+            flight.finish(e)
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
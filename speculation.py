@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from jobs import QUEUED, get_job_queue
+from script_cache import get_cache, make_cache_key
+from script_engine import find_similar_script
+
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+# Speculations of sessions that went away are forgotten after this long
+SPECULATION_RETENTION_SECONDS = 3600
+
+
+# One speculative generation for a session: waits out the debounce on a timer, then runs as a
+# background job that only warms the response cache (it is saved to history once Generate claims it).
+# The job doesn't count against the user's concurrency cap: a superseded speculation can't be
+# stopped upstream, and it must not hold up the generations the user does ask for.
+class Speculation:
+    def __init__(self, params):
+        self.params = params
+        self.created_at = time.time()
+        self.timer = None
+        self.job_id = None
+        self.cancelled = False
+        self.claimed = False
+
+
+# Starts generations before the user clicks Generate, once the request has stopped changing.
+# A claimed speculation is answered by joining its in-flight call or from the response cache.
+# Counters: started (jobs submitted), hits (claimed after the job had started), wasted (superseded
+# after spending an upstream call), cancelled (superseded before running) and skipped (the
+# answer was already cached, or a near-duplicate will be offered instead).
+class Speculator:
+    def __init__(self, debounce_seconds=DEFAULT_DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self._sessions = {}
+        self._counters = {"started": 0, "hits": 0, "wasted": 0, "cancelled": 0, "skipped": 0}
+        self._lock = threading.Lock()
+
+    # Note the current request of a session: a change cancels its speculation and restarts the debounce
+    def update(self, session_key, user_id, params):
+        with self._lock:
+            current = self._sessions.get(session_key)
+            if current is not None and current.params == params:
+                return
+            self._prune()
+            if current is not None:
+                self._discard(current)
+            speculation = Speculation(params)
+            speculation.timer = threading.Timer(self.debounce_seconds, self._start, args=(speculation, user_id))
+            speculation.timer.daemon = True
+            self._sessions[session_key] = speculation
+        speculation.timer.start()
+
+    def _start(self, speculation, user_id):
+        if get_cache().contains(make_cache_key(*speculation.params)) or find_similar_script(*speculation.params) is not None:
+            with self._lock:
+                self._counters["skipped"] += 1
+            return
+        with self._lock:
+            if speculation.cancelled:
+                return
+            speculation.job_id = get_job_queue().submit(user_id, *speculation.params, save_to_history=False, capped=False)
+            self._counters["started"] += 1
+
+    # Generate was clicked: returns True if a speculation for exactly these parameters had started.
+    # A stale speculation is cancelled; a matching one stays (claimed) so it isn't started again.
+    def claim(self, session_key, params):
+        with self._lock:
+            speculation = self._sessions.get(session_key)
+            if speculation is None or speculation.claimed:
+                return False
+            if speculation.params != params:
+                self._discard(self._sessions.pop(session_key))
+                return False
+            job = get_job_queue().get(speculation.job_id) if speculation.job_id else None
+            if job is None or job.status == QUEUED:
+                # Still debouncing or waiting for a scheduler slot, so it saves no time; the click generates directly
+                self._discard(speculation)
+                speculation.claimed = True
+                return False
+            # A running job already holds its scheduler slot, so the click just joins its flight
+            speculation.claimed = True
+            self._counters["hits"] += 1
+            return True
+
+    # Drop a session's speculation, e.g. when the request became incomplete or speculation was turned off
+    def cancel(self, session_key):
+        with self._lock:
+            speculation = self._sessions.pop(session_key, None)
+            if speculation is not None:
+                self._discard(speculation)
+
+    def _discard(self, speculation):
+        speculation.cancelled = True
+        speculation.timer.cancel()
+        if speculation.job_id is None or speculation.claimed:
+            return
+        job_queue = get_job_queue()
+        job = job_queue.get(speculation.job_id)
+        was_queued = job is not None and job.status == QUEUED
+        job_queue.cancel(speculation.job_id)
+        self._counters["cancelled" if was_queued else "wasted"] += 1
+
+    def _prune(self):
+        cutoff = time.time() - SPECULATION_RETENTION_SECONDS
+        for session_key in [key for key, speculation in self._sessions.items() if speculation.created_at < cutoff]:
+            del self._sessions[session_key]
+
+    # Counters plus hit and waste rates, both as shares of started speculations
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        started = stats["started"]
+        stats["hit_rate"] = stats["hits"] / started if started else 0.0
+        stats["waste_rate"] = stats["wasted"] / started if started else 0.0
+        return stats
+
+    # Prometheus text exposition of the counters
+    def prometheus(self):
+        lines = [
+            "# HELP scriptcraft_speculations_total Speculative generations by what became of them.",
+            "# TYPE scriptcraft_speculations_total counter",
+        ]
+        for outcome, count in self.stats().items():
+            if not outcome.endswith("_rate"):
+                lines.append(f'scriptcraft_speculations_total{{outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+_speculator = None
+_speculator_lock = threading.Lock()
+
+
+# Function to get the process-wide speculator
+def get_speculator():
+    global _speculator
+    with _speculator_lock:
+        if _speculator is None:
+            _speculator = Speculator(
+                debounce_seconds=float(os.getenv("SCRIPT_SPECULATION_DEBOUNCE_SECONDS", DEFAULT_DEBOUNCE_SECONDS))
+            )
+        return _speculator
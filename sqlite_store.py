@@ -0,0 +1,16 @@
+import sqlite3
+from contextlib import contextmanager
+
+
+# Open a short-lived connection to one of the SQLite stores that commits on success and is always
+# closed; rows=True returns sqlite3.Row rows (columns by name) instead of tuples
+@contextmanager
+def connect(path, rows=False):
+    conn = sqlite3.connect(path, timeout=30)
+    if rows:
+        conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
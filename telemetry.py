@@ -0,0 +1,213 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+
+DEFAULT_BUFFER_SIZE = 2000
+QUANTILES = [0.5, 0.95, 0.99]
+# Timing columns summarised in the admin panel and the Prometheus export
+TIMING_COLUMNS = {
+    "queue_ms": "Time waiting before the first upstream request",
+    "ttft_ms": "Time to the first output",
+    "latency_ms": "End-to-end generation latency",
+}
+
+
+# Function to estimate tokens from text with the common ~4 characters per token rule
+def estimate_tokens(text):
+    return len(text) // 4
+
+
+# One instrumented generation. Token counts are what this call spent upstream,
+# so cache hits and calls joined onto an identical in-flight request report 0.
+@dataclass
+class GenerationRecord:
+    timestamp: float
+    kind: str  # script, section or variants
+    content_type: str
+    duration: str
+    model: str
+    cache_hit: bool
+    coalesced: bool
+    outcome: str  # ok, abandoned, or the ScriptResult error kind
+    retries: int
+    queue_ms: float
+    ttft_ms: float
+    latency_ms: float
+    prompt_tokens: int
+    output_tokens: int
+    route: str = "primary"  # primary, fast, hedged:primary, hedged:fast, mixed, cache, or similar
+
+
+# Per-call generation telemetry: an in-memory ring buffer for live aggregates, process-lifetime
+# counters for the Prometheus export, plus an append-only JSONL log for offline analysis
+class Telemetry:
+    def __init__(self, path=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.path = path
+        self._records = deque(maxlen=buffer_size)
+        self._counters = {}  # (metric name, label values) -> total since the process started
+        self._lock = threading.Lock()
+
+    def _count(self, name, labels, value=1):
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def record(self, record):
+        line = json.dumps(asdict(record))
+        with self._lock:
+            self._records.append(record)
+            cache = "hit" if record.cache_hit else "miss"
+            self._count("scriptcraft_generations_total", (record.content_type, cache, record.outcome))
+            self._count("scriptcraft_route_total", (record.content_type, record.route, record.model))
+            self._count("scriptcraft_retries_total", (record.content_type,), record.retries)
+            self._count("scriptcraft_prompt_tokens_total", (record.content_type,), record.prompt_tokens)
+            self._count("scriptcraft_output_tokens_total", (record.content_type,), record.output_tokens)
+            for column in TIMING_COLUMNS:
+                value = getattr(record, column)
+                if value is not None:
+                    name = f"scriptcraft_{column[:-3]}_seconds"
+                    self._count(f"{name}_sum", (record.content_type,), value / 1000)
+                    self._count(f"{name}_count", (record.content_type,))
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    # pandas is only needed for aggregates, so the HTTP service and CLI don't pay for the import until then
+    def frame(self):
+        import pandas as pd
+        return pd.DataFrame([asdict(record) for record in self.records()], columns=list(GenerationRecord.__dataclass_fields__))
+
+    # Per-content-type (and "all") counts, rates and p50/p95/p99 timings over the ring buffer
+    def summary(self):
+        import pandas as pd
+        df = self.frame()
+        if df.empty:
+            return df
+        grouped = pd.concat([df, df.assign(content_type="all")]).groupby("content_type")
+        summary = pd.DataFrame({
+            "calls": grouped.size(),
+            "cache_hit_rate": grouped["cache_hit"].mean().round(3),
+            "error_rate": grouped["outcome"].apply(lambda s: (~s.isin(["ok", "abandoned"])).mean()).round(3),
+            "retries": grouped["retries"].sum(),
+            "prompt_tokens": grouped["prompt_tokens"].sum(),
+            "output_tokens": grouped["output_tokens"].sum(),
+        })
+        for column in TIMING_COLUMNS:
+            quantiles = grouped[column].quantile(QUANTILES).unstack()
+            for q in QUANTILES:
+                summary[f"{column[:-3]}_p{int(q * 100)}_ms"] = quantiles[q].round(1)
+        return summary.reset_index()
+
+    # Share of generations answered by each route, per content type (which path won)
+    def routes(self):
+        import pandas as pd
+        df = self.frame()
+        if df.empty:
+            return df
+        return pd.crosstab(df["content_type"], df["route"], normalize="index").round(3).reset_index()
+
+    # Prometheus text exposition: counters, and summary sums/counts, are monotonic totals since the
+    # process started; only the latency quantiles are computed over the ring buffer
+    def prometheus(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+        df = self.frame()
+
+        def series(name, label_names):
+            for (metric, labels), value in counters:
+                if metric == name:
+                    label_text = ",".join(f'{label}="{label_value}"' for label, label_value in zip(label_names, labels))
+                    yield f"{name}{{{label_text}}} {value if isinstance(value, int) else round(value, 4)}"
+
+        lines = []
+        for name, label_names, help_text in [
+            ("scriptcraft_generations_total", ("content_type", "cache", "outcome"), "Generations since the process started."),
+            ("scriptcraft_route_total", ("content_type", "route", "model"), "Generations by the route that answered."),
+            ("scriptcraft_retries_total", ("content_type",), "Upstream retries since the process started."),
+            ("scriptcraft_prompt_tokens_total", ("content_type",), "Prompt tokens sent upstream since the process started."),
+            ("scriptcraft_output_tokens_total", ("content_type",), "Output tokens received since the process started."),
+        ]:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += series(name, label_names)
+        for column, help_text in TIMING_COLUMNS.items():
+            name = f"scriptcraft_{column[:-3]}_seconds"
+            lines += [f"# HELP {name} {help_text} in seconds (quantiles over the telemetry window).", f"# TYPE {name} summary"]
+            for content_type, values in (df.groupby("content_type")[column] if not df.empty else []):
+                seconds = values.dropna() / 1000
+                if seconds.empty:
+                    continue
+                for q in QUANTILES:
+                    lines.append(f'{name}{{content_type="{content_type}",quantile="{q}"}} {seconds.quantile(q):.4f}')
+            lines += series(f"{name}_sum", ("content_type",))
+            lines += series(f"{name}_count", ("content_type",))
+        return "\n".join(lines) + "\n"
+
+
+# Collects the timings of one generation as it runs and turns them into a GenerationRecord
+class CallTimer:
+    def __init__(self, kind, content_type, duration, enqueued_at=None):
+        self.kind = kind
+        self.content_type = content_type
+        self.duration = str(duration)
+        self.started_at = time.time()
+        self.enqueued_at = enqueued_at or self.started_at
+        self.first_output_at = None
+
+    def first_output(self):
+        if self.first_output_at is None:
+            self.first_output_at = time.time()
+
+    def finish(self, model, route, outcome, cache_hit=False, coalesced=False, attempts=0, first_attempt_at=None, prompt_tokens=0, output_tokens=0):
+        finished_at = time.time()
+        dispatched_at = max(self.enqueued_at, first_attempt_at or self.started_at)
+        return GenerationRecord(
+            timestamp=finished_at,
+            kind=self.kind,
+            content_type=self.content_type,
+            duration=self.duration,
+            model=model,
+            route=route,
+            cache_hit=cache_hit,
+            coalesced=coalesced,
+            outcome=outcome,
+            retries=max(0, attempts - 1),
+            queue_ms=round((dispatched_at - self.enqueued_at) * 1000, 1),
+            ttft_ms=round((self.first_output_at - self.enqueued_at) * 1000, 1) if self.first_output_at else None,
+            latency_ms=round((finished_at - self.enqueued_at) * 1000, 1),
+            prompt_tokens=prompt_tokens,
+            output_tokens=output_tokens
+        )
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+# Function to get the process-wide telemetry sink; SCRIPT_TELEMETRY_PATH="" keeps it in memory only
+def get_telemetry():
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry(
+                path=os.getenv("SCRIPT_TELEMETRY_PATH", "script_telemetry.jsonl") or None,
+                buffer_size=int(os.getenv("SCRIPT_TELEMETRY_BUFFER", DEFAULT_BUFFER_SIZE))
+            )
+        return _telemetry
+
+
+# Print the summary and Prometheus export for a JSONL log: python telemetry.py [path]
+if __name__ == "__main__":
+    log_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("SCRIPT_TELEMETRY_PATH", "script_telemetry.jsonl")
+    telemetry = Telemetry(buffer_size=None)
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            telemetry.record(GenerationRecord(**json.loads(line)))
+    print(telemetry.summary().to_string(index=False))
+    print(telemetry.prometheus())
@@ -0,0 +1,233 @@
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+import numpy as np
+from sqlite_store import connect
+
+# MinHash / LSH settings: 20 bands of 5 rows make ~97% of pairs at Jaccard 0.7 candidates, ~18% at 0.4
+NUM_PERMUTATIONS = 100
+BANDS = 20
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_MAX_ENTRIES = 500_000
+# Entries added since the last merge are kept in small dicts until there are this many
+MERGE_EVERY = 2000
+
+NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+    "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12", "fifteen": "15",
+    "twenty": "20", "thirty": "30", "fifty": "50", "hundred": "100",
+}
+STOPWORDS = {
+    "a", "an", "the", "to", "for", "of", "and", "or", "in", "on", "at", "by", "with", "from",
+    "your", "my", "our", "their", "you", "i", "we", "is", "are", "be", "that", "this", "about",
+}
+
+# Fixed multiply-shift hash family (64-bit odd multipliers, arithmetic mod 2**64, top 32 bits)
+# so signatures stored on disk stay valid across restarts
+_random = np.random.RandomState(20240601)
+_HASH_A = _random.randint(0, 2 ** 64, size=NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _random.randint(0, 2 ** 64, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_BAND_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+# Plurals first, so "mornings" and "morning" both end up as "morn"
+def _stem(word):
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 4 and word.endswith("ed"):
+        return word[:-2]
+    return word
+
+
+# Function to normalize a title so rewordings compare equal: lowercase, number words as digits,
+# no stopwords or punctuation, crude stemming, and words sorted so order doesn't matter
+def normalize_title(title):
+    words = re.findall(r"\w+", str(title).lower())
+    words = [_stem(NUMBER_WORDS.get(word, word)) for word in words if word not in STOPWORDS]
+    return " ".join(sorted(words))
+
+
+# Function to get the character trigrams of a normalized title
+def shingles(normalized):
+    padded = f" {normalized} "
+    return {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+# Function to compute the MinHash signature (NUM_PERMUTATIONS uint32 values) of a shingle set
+def minhash(shingle_set):
+    values = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    hashed = (_HASH_A[:, None] * values[None, :] + _HASH_B[:, None]) >> np.uint64(32)
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+# Function to hash each band of n signatures (n x NUM_PERMUTATIONS), salted with each one's scope,
+# into an n x BANDS uint64 matrix
+def band_hashes(signatures, scopes):
+    rows = signatures.reshape(len(signatures), BANDS, ROWS_PER_BAND).astype(np.uint64)
+    salts = np.fromiter((zlib.crc32(scope.encode("utf-8")) for scope in scopes), dtype=np.uint64, count=len(scopes))
+    hashed = salts[:, None] + np.arange(BANDS, dtype=np.uint64)[None, :]
+    for column in range(ROWS_PER_BAND):
+        hashed = hashed * _BAND_MULTIPLIER + rows[:, :, column]
+    return hashed
+
+
+# A past generation with a similar title
+@dataclass
+class TitleMatch:
+    cache_key: str
+    title: str
+    similarity: float
+
+
+# Near-duplicate title index over cached generations. Titles are grouped by scope (the other
+# generation parameters) and found through MinHash LSH: each band hash is looked up in a sorted
+# numpy array (plus a small dict of recent additions), then candidates are checked by exact
+# trigram Jaccard. Entries persist in SQLite with their signatures, so restarts don't rehash.
+class TitleIndex:
+    def __init__(self, path, threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with connect(self.path, rows=True) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS titles (
+                    cache_key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    normalized TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            rows = conn.execute(
+                "SELECT cache_key, scope, title, normalized, signature FROM titles ORDER BY created_at"
+            ).fetchall()
+        # Per entry (entry id = list position); removed entries stay as dead slots until the next merge
+        self._keys = [row["cache_key"] for row in rows]
+        self._titles = [row["title"] for row in rows]
+        self._normalized = [row["normalized"] for row in rows]
+        self._alive = [True] * len(rows)
+        self._positions = {cache_key: i for i, cache_key in enumerate(self._keys)}
+        signatures = np.frombuffer(b"".join(row["signature"] for row in rows), dtype=np.uint32).reshape(len(rows), NUM_PERMUTATIONS)
+        self._hashes = band_hashes(signatures, [row["scope"] for row in rows])
+        self._rebuild()
+
+    # Sort every band's hashes for binary search; entries added later go to the per-band dicts
+    def _rebuild(self):
+        order = np.argsort(self._hashes.T, axis=1, kind="stable")
+        self._sorted_hashes = np.take_along_axis(self._hashes.T, order, axis=1)
+        self._sorted_ids = order
+        self._recent = [{} for _ in range(BANDS)]
+        self._recent_hashes = []
+
+    # Fold recent additions into the sorted arrays, dropping removed entries and the oldest beyond max_entries
+    def _merge(self):
+        if self._recent_hashes:
+            self._hashes = np.vstack([self._hashes] + self._recent_hashes)
+        alive = [i for i, is_alive in enumerate(self._alive) if is_alive]
+        keep = alive[-self.max_entries:]
+        dropped = [self._keys[i] for i in alive[:len(alive) - len(keep)]]
+        self._keys = [self._keys[i] for i in keep]
+        self._titles = [self._titles[i] for i in keep]
+        self._normalized = [self._normalized[i] for i in keep]
+        self._alive = [True] * len(keep)
+        self._positions = {cache_key: i for i, cache_key in enumerate(self._keys)}
+        self._hashes = self._hashes[keep] if keep else np.empty((0, BANDS), dtype=np.uint64)
+        self._rebuild()
+        if dropped:
+            with connect(self.path, rows=True) as conn:
+                conn.executemany("DELETE FROM titles WHERE cache_key = ?", [(cache_key,) for cache_key in dropped])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._positions)
+
+    # Index a generated title under its scope; the cache key points at the stored script
+    def add(self, cache_key, scope, title):
+        normalized = normalize_title(title)
+        signature = minhash(shingles(normalized))
+        hashes = band_hashes(signature[None, :], [scope])
+        with self._lock:
+            with connect(self.path, rows=True) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO titles (cache_key, scope, title, normalized, signature, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (cache_key, scope, title, normalized, signature.tobytes(), time.time())
+                )
+            previous = self._positions.get(cache_key)
+            if previous is not None:
+                self._alive[previous] = False
+            entry_id = len(self._keys)
+            self._keys.append(cache_key)
+            self._titles.append(title)
+            self._normalized.append(normalized)
+            self._alive.append(True)
+            self._positions[cache_key] = entry_id
+            for band, band_hash in enumerate(hashes[0].tolist()):
+                self._recent[band].setdefault(band_hash, []).append(entry_id)
+            self._recent_hashes.append(hashes)
+            if len(self._recent_hashes) >= MERGE_EVERY:
+                self._merge()
+
+    # Forget an entry, e.g. when its script has left the cache
+    def remove(self, cache_key):
+        with self._lock:
+            entry_id = self._positions.pop(cache_key, None)
+            if entry_id is not None:
+                self._alive[entry_id] = False
+            with connect(self.path, rows=True) as conn:
+                conn.execute("DELETE FROM titles WHERE cache_key = ?", (cache_key,))
+
+    # Return the best match at or above the threshold within the scope, or None
+    def lookup(self, scope, title, exclude_key=None):
+        normalized = normalize_title(title)
+        query_shingles = shingles(normalized)
+        hashes = band_hashes(minhash(query_shingles)[None, :], [scope])[0]
+        with self._lock:
+            candidates = set()
+            for band, band_hash in enumerate(hashes.tolist()):
+                row = self._sorted_hashes[band]
+                start = row.searchsorted(hashes[band], side="left")
+                end = row.searchsorted(hashes[band], side="right")
+                if end > start:
+                    candidates.update(self._sorted_ids[band, start:end].tolist())
+                candidates.update(self._recent[band].get(band_hash, ()))
+            best = None
+            for entry_id in candidates:
+                if not self._alive[entry_id] or self._keys[entry_id] == exclude_key:
+                    continue
+                candidate = self._normalized[entry_id]
+                similarity = 1.0 if candidate == normalized else jaccard(query_shingles, shingles(candidate))
+                if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                    best = TitleMatch(self._keys[entry_id], self._titles[entry_id], round(similarity, 3))
+            return best
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# Function to get the process-wide title index
+def get_title_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TitleIndex(
+                path=os.getenv("SCRIPT_TITLE_INDEX_PATH", "script_titles.db"),
+                threshold=float(os.getenv("SCRIPT_SIMILARITY_THRESHOLD", DEFAULT_THRESHOLD)),
+                max_entries=int(os.getenv("SCRIPT_TITLE_INDEX_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+            )
+        return _index
@@ -0,0 +1,332 @@
+# Static page assets, built once per process when first imported (Streamlit keeps
+# imported modules across reruns, so nothing here is rebuilt on each interaction)
+
+# Custom CSS with enhanced vibrant design
+APP_CSS = """
+<style>
+    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
+    
+    * {
+        font-family: 'Poppins', sans-serif;
+    }
+    
+    .main {
+        background: linear-gradient(135deg, #f5f7f9 0%, #e8f0fe 100%);
+    }
+    
+    .stApp {
+        max-width: 1200px;
+        margin: 0 auto;
+    }
+    
+    .script-container {
+        background-color: white;
+        padding: 25px;
+        border-radius: 12px;
+        box-shadow: 0 8px 20px rgba(0,0,0,0.1);
+        margin-top: 20px;
+        border-left: 5px solid #4B61D1;
+    }
+    
+    .content-card {
+        background: white;
+        padding: 20px;
+        border-radius: 12px;
+        margin-bottom: 20px;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.08);
+        transition: all 0.4s ease;
+        border: 1px solid rgba(0,0,0,0.05);
+    }
+    
+    .content-card:hover {
+        transform: translateY(-8px);
+        box-shadow: 0 12px 25px rgba(0,0,0,0.12);
+        border-color: rgba(75, 97, 209, 0.2);
+    }
+    
+    .stat-box {
+        background: linear-gradient(135deg, #4B61D1 0%, #7C8CE8 100%);
+        color: white;
+        padding: 10px;
+        border-radius: 8px;
+        text-align: center;
+        font-weight: 500;
+        box-shadow: 0 4px 10px rgba(75, 97, 209, 0.3);
+    }
+    
+    h1 {
+        color: #1E3A8A;
+        font-weight: 700;
+        margin-bottom: 5px;
+    }
+    
+    h2, h3 {
+        color: #1E3A8A;
+        font-weight: 600;
+    }
+    
+    .stButton>button {
+        background: linear-gradient(135deg, #4B61D1 0%, #3B4FBF 100%);
+        color: white;
+        border-radius: 8px;
+        padding: 10px 20px;
+        border: none;
+        font-weight: 500;
+        transition: all 0.3s;
+        box-shadow: 0 4px 10px rgba(59, 79, 191, 0.3);
+    }
+    
+    .stButton>button:hover {
+        background: linear-gradient(135deg, #3B4FBF 0%, #2A3CA9 100%);
+        transform: translateY(-2px) scale(1.02);
+        box-shadow: 0 6px 15px rgba(59, 79, 191, 0.4);
+    }
+    
+    .tab-content {
+        padding: 20px 0;
+    }
+    
+    /* Styling for sidebar */
+    .sidebar .css-1d391kg {
+        background: linear-gradient(180deg, #f8faff 0%, #e8f0fe 100%);
+    }
+    
+    .sidebar-header {
+        padding: 25px 0;
+        text-align: center;
+        border-bottom: 1px solid #e0e0e0;
+    }
+    
+    .sidebar-item {
+        padding: 12px;
+        margin: 8px 0;
+        border-radius: 8px;
+        transition: all 0.3s;
+        cursor: pointer;
+    }
+    
+    .sidebar-item:hover {
+        background-color: rgba(75, 97, 209, 0.1);
+        transform: translateX(5px);
+    }
+    
+    /* Added for clear content type indication */
+    .selected-type {
+        background: linear-gradient(135deg, #e8f0fe 0%, #d1ddff 100%);
+        border-left: 3px solid #4B61D1;
+        padding-left: 12px;
+        font-weight: 500;
+    }
+    
+    /* Content type cards */
+    .type-card {
+        text-align: center;
+        background: white;
+        border-radius: 12px;
+        padding: 20px 15px;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.08);
+        transition: all 0.4s;
+        height: 100%;
+        cursor: pointer;
+        border: 2px solid transparent;
+    }
+    
+    .type-card:hover {
+        transform: translateY(-6px);
+        box-shadow: 0 12px 25px rgba(75, 97, 209, 0.18);
+        border-color: #4B61D1;
+    }
+    
+    .type-card h3 {
+        font-size: 20px;
+        margin-bottom: 10px;
+        color: #1E3A8A;
+    }
+    
+    .type-card p {
+        font-size: 14px;
+        color: #555;
+    }
+    
+    .type-card .icon {
+        font-size: 36px;
+        margin-bottom: 15px;
+        color: #4B61D1;
+    }
+    
+    /* Animation for loading */
+    @keyframes pulse {
+        0% { opacity: 0.6; }
+        50% { opacity: 1; }
+        100% { opacity: 0.6; }
+    }
+    
+    .loading {
+        animation: pulse 1.5s infinite ease-in-out;
+    }
+</style>
+"""
+
+NAV_OPTIONS = ["Create Script", "My Scripts", "Batch", "Tips & Templates"]
+TONE_OPTIONS = ["casual", "professional", "humorous", "inspirational", "educational"]
+
+# Content types with enhanced visual appeal
+CONTENT_TYPE_CARDS = {
+    "instagram": {
+        "icon": "📱",
+        "name": "Instagram Reel",
+        "desc": "Short, engaging content for Instagram reels/stories",
+        "help": "Create content for Instagram reels and stories"
+    },
+    "youtube": {
+        "icon": "🎬",
+        "name": "YouTube Video",
+        "desc": "Structured scripts for long-form YouTube videos",
+        "help": "Create scripted content for YouTube videos"
+    },
+    "podcast": {
+        "icon": "🎙️",
+        "name": "Podcast Q&A",
+        "desc": "Insightful Q&A for engaging podcast episodes",
+        "help": "Create Q&A content for podcast episodes"
+    }
+}
+
+CONTENT_TYPE_LABELS = {
+    "instagram": "📱 Instagram Reel",
+    "youtube": "🎬 YouTube Video",
+    "podcast": "🎙️ Podcast Q&A"
+}
+
+
+# Function to build the HTML card for a content type, highlighted when selected
+def _type_card_html(content_type, is_selected):
+    card = CONTENT_TYPE_CARDS[content_type]
+    border_style = "border-color: #4B61D1;" if is_selected else ""
+    bg_style = "background: linear-gradient(135deg, #e8f0fe 0%, #d1ddff 100%);" if is_selected else ""
+    return f"""
+            <div class="type-card" style="{border_style}{bg_style}" onclick="document.getElementById('{content_type}_btn').click();">
+                <div class="icon">{card["icon"]}</div>
+                <h3>{card["name"]}</h3>
+                <p>{card["desc"]}</p>
+            </div>
+            """
+
+
+# Card HTML by (content_type, is_selected)
+TYPE_CARD_HTML = {
+    (content_type, is_selected): _type_card_html(content_type, is_selected)
+    for content_type in CONTENT_TYPE_CARDS
+    for is_selected in (False, True)
+}
+
+CREATE_HEADER_HTML = [
+    "<div style='text-align:center;padding:20px 0;'>",
+    "<h1 style='font-size:48px;background:linear-gradient(90deg, #1E3A8A, #4B61D1);-webkit-background-clip:text;-webkit-text-fill-color:transparent;'>ScriptCraft AI Studio</h1>",
+    "<p style='font-size:18px;color:#555;margin-bottom:30px;'>Transform your ideas into engaging scripts in seconds with AI-powered creativity</p>",
+    "</div>",
+]
+
+TIPS_MARKDOWN = """
+### Creating Engaging Interview Questions
+
+Great podcast interviews come from thoughtful questions that:
+
+- **Start broad, then go deep** - Begin with context-setting questions before diving into specifics
+- **Use the "curiosity ladder"** - Each question should build on the previous answer
+- **Ask "why" not just "what"** - Get to motivations and feelings, not just facts
+- **Prepare follow-ups** - Anticipate responses and have thoughtful follow-ups ready
+
+### Podcast Episode Structure
+
+1. **Intro (2-3 minutes)** - Welcome, guest introduction, episode overview
+2. **Background (5-10 minutes)** - Establish guest credibility and journey
+3. **Main discussion (15-30 minutes)** - Core topic exploration through prepared questions
+4. **Lightning round (5 minutes)** - Quick, fun questions to end on a high note
+5. **Outro (2 minutes)** - Thank guest, summarize insights, call-to-action
+
+### Creating a Comfortable Interview Environment
+
+- Send questions to guests in advance (but keep a few surprises)
+- Begin with softball questions to build rapport
+- Use "Yes, and..." technique to build on guest responses
+- Include personal stories or experiences to make the conversation relatable
+"""
+
+PODCAST_TEMPLATE = """
+# PODCAST INTERVIEW TEMPLATE
+
+## INTRO (2-3 minutes)
+HOST: "Welcome to [Podcast Name], the show where we [podcast mission]. I'm your host [Name], and today I'm thrilled to be joined by [Guest Name], who is [brief credential]. [Guest], welcome to the show!"
+
+GUEST: [Response]
+
+HOST: "For our listeners who might not be familiar with your work, could you share a bit about who you are and what you do?"
+
+GUEST: [Response]
+
+HOST: "On today's episode, we'll be diving into [episode topic]. Here's what we'll cover..."
+
+## BACKGROUND QUESTIONS (5-10 minutes)
+1. "What first drew you to [field/area of expertise]?"
+   * Follow-up: "Was there a specific moment when you knew this was your path?"
+
+2. "You've accomplished [notable achievement]. Can you walk us through that journey?"
+   * Follow-up: "What obstacles did you face along the way?"
+
+3. "How has your approach to [topic] evolved over time?"
+   * Follow-up: "What caused that shift in perspective?"
+
+## MAIN TOPIC QUESTIONS (15-30 minutes)
+4. "What's the biggest misconception people have about [topic]?"
+   * Follow-up: "Why do you think this misconception persists?"
+
+5. "In your [book/article/talk], you mentioned [specific point]. Could you elaborate on that?"
+   * Follow-up: "How have you applied this principle in your own work?"
+
+6. "What's a counterintuitive truth about [topic] that most people don't realize?"
+   * Follow-up: "How did you discover this?"
+
+7. "How do you think [recent development] will impact [industry/field]?"
+   * Follow-up: "What should people be doing to prepare for this change?"
+
+8. "If someone wanted to get started with [topic], what would be your advice?"
+   * Follow-up: "What resources would you recommend?"
+
+## LIGHTNING ROUND (5 minutes)
+9. "What's one tool or resource you couldn't live without?"
+10. "What's a book that changed your perspective?"
+11. "What's your favorite failure?" (lesson learned from a setback)
+12. "What's a small habit that has had a big impact on your success?"
+13. "Fill in the blank: 'Most people would be better at [topic] if they just _____.'"
+
+## OUTRO (2 minutes)
+HOST: "Before we wrap up, where can our listeners find you and learn more about your work?"
+
+GUEST: [Response]
+
+HOST: "Any final thoughts or advice for our listeners interested in [topic]?"
+
+GUEST: [Response]
+
+HOST: "Thank you so much for sharing your insights with us today. To our listeners, if you enjoyed this episode, please subscribe and leave a review. Join us next week when we'll be talking with [Next Guest] about [Topic]. Until then, [Signature Sign-off]."
+
+[NOTES FOR HOST]
+- Research guest thoroughly before interview
+- Listen actively and be willing to go off-script for interesting tangents
+- Have water available for guest
+- Monitor time to ensure all key questions are covered
+"""
+
+TIPS_FOOTER_HTML = """
+<div style="margin-top: 50px; padding: 20px; background: linear-gradient(135deg, #f5f7f9 0%, #e8f0fe 100%); border-radius: 10px; text-align: center;">
+    <p style="margin-bottom: 10px; font-weight: 500;">ScriptCraft AI | Craft. Create. Connect.</p>
+    <p style="font-size: 12px; color: #666;">© 2023 ScriptCraft AI. All rights reserved.</p>
+</div>
+"""
+
+FOOTER_HTML = """
+<div style="margin-top: 50px; padding: 20px; text-align: center; font-size: 12px; color: #666;">
+    © 2023 ScriptCraft AI. All rights reserved.
+</div>
+"""